@@ -1,112 +1,57 @@
 """LangGraph multi-agent debugging system"""
 from typing import TypedDict, Annotated, Sequence
 from langgraph.graph import StateGraph, END, START
+from langgraph.types import Send
 from langgraph.checkpoint.memory import MemorySaver
 from langchain_ollama import ChatOllama
-from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from operator import add
+import asyncio
+import hashlib
 import json
+import re
 
-from .models import ErrorType, Patch, PatchSource, ExecutionResult
+from .models import ErrorType, Patch, PatchSource, ExecutionResult, ExecutionStatus
 from .sandbox_executor import SandboxExecutor
 from .rule_based_patcher import RuleBasedPatcher
+from .llm_cache import LLMCache
+from .llm_batcher import LLMBatcher
 import uuid
 import difflib
 from langchain_groq import ChatGroq
 
-class DebugState(TypedDict):
-    """State for the debugging agent system"""
-    code: str
-    error_message: str
-    error_type: str
-    traceback: str
-    execution_result: dict
-    version: int
-    patches: list[dict]
-    messages: Annotated[Sequence[BaseMessage], add]
-    current_agent: str
-    reasoning: str
-    needs_llm: bool
-    iterations: int
-    max_iterations: int
-    status: str  # "running", "success", "failed"
-    traces: list[str]
+# difflib's pure-Python SequenceMatcher is quadratic and slow on
+# multi-hundred-line files; use the C drop-in when it is installed
+try:
+    from cdifflib import CSequenceMatcher
+    difflib.SequenceMatcher = CSequenceMatcher
+except ImportError:
+    pass
 
+# Compiled once: matched against every LLM response during code extraction
+_CODE_BLOCK_PATTERNS = [
+    re.compile(r'```python\n(.*?)\n```', re.DOTALL),
+    re.compile(r'```\n(.*?)\n```', re.DOTALL),
+]
 
-class MultiAgentDebugger:
-    """Multi-agent system for code debugging using LangGraph"""
-    
-    def __init__(self, model_name: str = "codellama:7b", temperature: float = 0.1):
-        self.llm = ChatGroq(
-            model_name="llama-3.3-70b-versatile",
-            temperature=0.7
-        )
-        self.sandbox = SandboxExecutor()
-        self.rule_patcher = RuleBasedPatcher()
-        self.checkpointer = MemorySaver()
-        
-        # Build the agent graph
-        self.graph = self._build_graph()
-    
-    def _build_graph(self) -> StateGraph:
-        """Build the LangGraph multi-agent system"""
-        workflow = StateGraph(DebugState)
-        
-        # Add agent nodes
-        workflow.add_node("error_interpreter", self._error_interpreter_agent)
-        workflow.add_node("patch_generator", self._patch_generator_agent)
-        workflow.add_node("validator", self._validator_agent)
-        workflow.add_node("test_creator", self._test_creator_agent)
-        workflow.add_node("refactor", self._refactor_agent)
-        workflow.add_node("explainer", self._explainer_agent)
-        
-        # Define the flow
-        workflow.add_edge(START, "error_interpreter")
-        workflow.add_edge("error_interpreter", "patch_generator")
-        workflow.add_edge("patch_generator", "validator")
-        
-        # Conditional edges
-        workflow.add_conditional_edges(
-            "validator",
-            self._should_continue,
-            {
-                "test_creator": "test_creator",
-                "refactor": "refactor",
-                "explainer": "explainer",
-                "end": END
-            }
-        )
-        
-        workflow.add_edge("test_creator", "explainer")
-        workflow.add_edge("refactor", "explainer")
-        workflow.add_edge("explainer", END)
-        
-        return workflow.compile(checkpointer=self.checkpointer)
-    
-    def _error_interpreter_agent(self, state: DebugState) -> dict:
-        """Agent that interprets and categorizes errors"""
-        
-        # Check if this is successful execution that needs logical analysis
-        is_successful = state.get('execution_result', {}).get('status') == 'success'
-        
-        if is_successful:
-            trace = f"[Error Interpreter] Analyzing successful code for logical errors"
-            
-            prompt = f"""You are an expert Python code reviewer. This code executed successfully but may have logical errors or issues.
+# Prose prefixes that mark explanation lines, not code
+_EXPLANATION_PREFIXES = ('Here', 'The', 'This', 'I ', 'Fixed')
 
-CODE THAT WAS EXECUTED:
-```python
-{state['code']}
-```
+# Bound once: enum-identity comparison in the validator is a pointer check,
+# vs descriptor lookup + string compare for .value == "success"
+_SUCCESS = ExecutionStatus.SUCCESS
 
-EXECUTION OUTPUT:
-Stdout: {state.get('execution_result', {}).get('stdout', '')}
-Stderr: {state.get('execution_result', {}).get('stderr', '')}
-Exit Code: {state.get('execution_result', {}).get('exit_code', 0)}
+# Static prompt blocks hoisted to module level so every call shares a
+# byte-identical prefix. Sent as SystemMessage ahead of the dynamic
+# HumanMessage, this keeps the prefix hash stable across sessions and lets
+# the provider reuse its KV cache instead of re-processing ~2 KB of
+# instructions per call. Variable data (code, errors) never goes in here.
+
+INTERPRETER_LOGIC_SYSTEM = """You are an expert Python code reviewer. The code you receive executed successfully but may have logical errors or issues.
 
 === LOGICAL ERROR ANALYSIS ===
 
-Analyze this code for:
+Analyze the code for:
 
 1. ALGORITHM ERRORS:
    - Binary search: Check loop condition (should be 'while low <= high', not 'while low < high')
@@ -143,77 +88,59 @@ Your Analysis:
 3. What is the correct implementation? [brief description]
 4. Severity: [CRITICAL/MEDIUM/LOW/NONE]
 
-If the code is logically correct and complete, respond with "NONE - Code is correct".
-"""
-        else:
-            trace = f"[Error Interpreter] Analyzing error: {state['error_type']}"
-            
-            prompt = f"""You are an expert Python debugger. Analyze this execution error with precision.
+If the code is logically correct and complete, respond with "NONE - Code is correct"."""
 
-CODE THAT WAS EXECUTED:
-```python
-{state['code']}
-```
-
-EXECUTION RESULT:
-Error Type: {state['error_type']}
-Error Message: {state['error_message']}
-
-Full Traceback:
-{state['traceback']}
-
-=== ERROR CATEGORY ANALYSIS ===
-
-Identify which category this error belongs to:
-
-1. SYNTAX ERRORS (SyntaxError, IndentationError):
+# Error-category taxonomy, split per category so prompts can carry only the
+# section matching the known error_type instead of the full ~2 KB taxonomy
+_ERROR_CATEGORY_SECTIONS = {
+    "syntax": """1. SYNTAX ERRORS (SyntaxError, IndentationError):
    - Missing colons after if/for/while/def/class
    - Wrong indentation levels
    - Missing/extra parentheses
    - Python 2 vs 3 syntax (print statements)
-   - Typos in keywords
-
-2. NAME ERRORS (NameError, UnboundLocalError):
+   - Typos in keywords""",
+    "name": """2. NAME ERRORS (NameError, UnboundLocalError):
    - Undefined variables
    - Misspelled variable names
    - Using variable before assignment
-   - Missing imports
-
-3. TYPE ERRORS (TypeError):
+   - Missing imports""",
+    "type": """3. TYPE ERRORS (TypeError):
    - Wrong argument types (str + int)
    - Wrong number of arguments
    - Unsupported operations between types
-   - List vs string operations
-
-4. INDEX ERRORS (IndexError):
+   - List vs string operations""",
+    "index": """4. INDEX ERRORS (IndexError):
    - Array/list index out of range
    - Off-by-one errors in loops
    - Wrong loop bounds (range issues)
-   - Empty list access
-
-5. VALUE ERRORS (ValueError):
+   - Empty list access""",
+    "value": """5. VALUE ERRORS (ValueError):
    - Invalid int() conversion
    - Wrong input format
-   - Invalid function parameters
-
-6. LOGICAL ERRORS (Wrong output, no crash):
+   - Invalid function parameters""",
+    "logic": """6. LOGICAL ERRORS (Wrong output, no crash):
    - Wrong algorithm implementation
    - Incorrect loop direction
    - Wrong return values
-   - Missing edge cases
-
-7. RECURSION ERRORS (RecursionError):
+   - Missing edge cases""",
+    "recursion": """7. RECURSION ERRORS (RecursionError):
    - Missing base case
    - Wrong recursive parameters
-   - Infinite recursion
-
-8. RUNTIME ERRORS:
+   - Infinite recursion""",
+    "runtime": """8. RUNTIME ERRORS:
    - ZeroDivisionError
    - AttributeError (wrong object method)
    - KeyError (missing dict key)
-   - FileNotFoundError
+   - FileNotFoundError""",
+}
 
-Your Analysis:
+_INTERPRETER_ERROR_HEADER = """You are an expert Python debugger. Analyze the execution error you receive with precision.
+
+=== ERROR CATEGORY ANALYSIS ===
+
+Identify which category the error belongs to:"""
+
+_INTERPRETER_ERROR_FOOTER = """Your Analysis:
 1. Error Category: [specify from above]
 2. Exact Line Number: [line that caused error]
 3. Root Cause: [why error occurred]
@@ -221,38 +148,37 @@ Your Analysis:
 
 Be specific and concise. Focus on the ACTUAL error, not hypothetical issues."""
 
-        messages = [HumanMessage(content=prompt)]
-        response = self.llm.invoke(messages)
-        
-        reasoning = response.content
-        
-        return {
-            "messages": messages + [response],
-            "current_agent": "error_interpreter",
-            "reasoning": reasoning,
-            "traces": state.get("traces", []) + [trace]
-        }
-    
-    def _patch_generator_agent(self, state: DebugState) -> dict:
-        """Agent that generates code patches"""
-        trace = f"[Patch Generator] Generating patch for version {state['version']}"
-        
-        # Check if analyzing successful code for logical errors
-        is_successful = state.get('execution_result', {}).get('status') == 'success'
-        
-        if is_successful:
-            prompt = f"""You are a precise Python code fixer. Fix logical errors in this code that executed successfully but has bugs.
 
-ORIGINAL CODE (executed successfully but has logical errors):
-```python
-{state['code']}
-```
+def _compose_interpreter_system(section_keys) -> str:
+    sections = '\n\n'.join(_ERROR_CATEGORY_SECTIONS[k] for k in section_keys)
+    return f"{_INTERPRETER_ERROR_HEADER}\n\n{sections}\n\n{_INTERPRETER_ERROR_FOOTER}"
 
-EXECUTION OUTPUT:
-{state.get('execution_result', {}).get('stdout', '')}
 
-LOGICAL ERROR ANALYSIS:
-{state['reasoning']}
+# Which taxonomy sections are relevant for each classified error type;
+# unknown/unlisted types fall back to the full taxonomy
+_SECTIONS_BY_ERROR_TYPE = {
+    ErrorType.SYNTAX: ("syntax",),
+    ErrorType.IMPORT: ("name",),
+    ErrorType.NAME: ("name",),
+    ErrorType.TYPE: ("type",),
+    ErrorType.ATTRIBUTE: ("runtime",),
+    ErrorType.INDEX: ("index",),
+    ErrorType.KEY: ("runtime",),
+    ErrorType.VALUE: ("value",),
+    ErrorType.LOGIC: ("logic",),
+    ErrorType.RUNTIME: ("recursion", "runtime"),
+}
+
+INTERPRETER_ERROR_SYSTEM = _compose_interpreter_system(_ERROR_CATEGORY_SECTIONS)
+
+# Precomposed per-error-type variants: each is still a stable prefix for
+# provider-side caching, but typically ~300 B instead of ~2 KB
+INTERPRETER_ERROR_SYSTEMS = {
+    etype: _compose_interpreter_system(keys)
+    for etype, keys in _SECTIONS_BY_ERROR_TYPE.items()
+}
+
+PATCH_LOGIC_SYSTEM = """You are a precise Python code fixer. Fix logical errors in code that executed successfully but has bugs.
 
 === FIX STRATEGIES FOR LOGICAL ERRORS ===
 
@@ -288,68 +214,48 @@ LOGICAL ERROR ANALYSIS:
 3. Keep all other code unchanged
 4. Return ONLY valid Python code
 5. Do NOT add comments or explanations
-6. If function is only defined, add a test call at the end
-
-FIXED CODE:"""
-        else:
-            prompt = f"""You are a precise Python code fixer. Fix ONLY the specific error with MINIMAL changes.
-
-ORIGINAL CODE (that failed):
-```python
-{state['code']}
-```
+6. If function is only defined, add a test call at the end"""
 
-ERROR THAT OCCURRED:
-{state['error_message']}
-
-TRACEBACK:
-{state['traceback']}
-
-ERROR ANALYSIS:
-{state['reasoning']}
-
-=== FIX STRATEGIES BY ERROR TYPE ===
-
-1. SYNTAX ERRORS:
+# Fix strategies, split per category the same way as the interpreter taxonomy
+_FIX_STRATEGY_SECTIONS = {
+    "syntax": """1. SYNTAX ERRORS:
    - Add missing colons after if/for/while/def/class
    - Fix indentation (use 4 spaces)
    - Add missing parentheses
-   - Convert print statements to print() functions
-
-2. NAME ERRORS:
+   - Convert print statements to print() functions""",
+    "name": """2. NAME ERRORS:
    - Check for typos (ture→True, fasle→False)
    - Add missing variable initialization
-   - Add missing imports (only if NameError/ImportError)
-
-3. TYPE ERRORS:
+   - Add missing imports (only if NameError/ImportError)""",
+    "type": """3. TYPE ERRORS:
    - Add str() around integers for string concat
    - Add int() for float→int conversions
-   - Fix function arguments
-
-4. INDEX ERRORS:
+   - Fix function arguments""",
+    "index": """4. INDEX ERRORS:
    - Add bounds check: if i < len(arr)
    - Fix range(): use len(arr) not len(arr)+1
-   - Check for empty lists before access
-
-5. VALUE ERRORS:
+   - Check for empty lists before access""",
+    "value": """5. VALUE ERRORS:
    - Wrap int() in try-except ValueError
-   - Add input validation
-
-6. LOGICAL ERRORS:
+   - Add input validation""",
+    "logic": """6. LOGICAL ERRORS:
    - Fix algorithm logic
    - Correct loop conditions
-   - Fix return values
-
-7. RECURSION ERRORS:
+   - Fix return values""",
+    "recursion": """7. RECURSION ERRORS:
    - Add base case: if n <= 0: return ...
-   - Fix recursive call parameters
-
-8. RUNTIME ERRORS:
+   - Fix recursive call parameters""",
+    "runtime": """8. RUNTIME ERRORS:
    - ZeroDivisionError: Add if b != 0 check
    - AttributeError: Fix method name or object type
-   - KeyError: Use dict.get(key, default)
+   - KeyError: Use dict.get(key, default)""",
+}
 
-=== STRICT RULES ===
+_PATCH_ERROR_HEADER = """You are a precise Python code fixer. Fix ONLY the specific error with MINIMAL changes.
+
+=== FIX STRATEGIES BY ERROR TYPE ==="""
+
+_PATCH_ERROR_FOOTER = """=== STRICT RULES ===
 1. Fix ONLY the line(s) that caused the error
 2. Do NOT add imports unless error is ImportError/ModuleNotFoundError
 3. Do NOT add new features or functionality
@@ -357,21 +263,375 @@ ERROR ANALYSIS:
 5. Make the MINIMAL change needed
 6. Return ONLY valid Python code
 7. Do NOT add comments or explanations
-8. Keep all working parts of code unchanged
+8. Keep all working parts of code unchanged"""
 
-FIXED CODE:"""
 
-        messages = [HumanMessage(content=prompt)]
-        response = self.llm.invoke(messages)
+def _compose_patch_system(section_keys) -> str:
+    sections = '\n\n'.join(_FIX_STRATEGY_SECTIONS[k] for k in section_keys)
+    return f"{_PATCH_ERROR_HEADER}\n\n{sections}\n\n{_PATCH_ERROR_FOOTER}"
+
+
+PATCH_ERROR_SYSTEM = _compose_patch_system(_FIX_STRATEGY_SECTIONS)
+
+PATCH_ERROR_SYSTEMS = {
+    etype: _compose_patch_system(keys)
+    for etype, keys in _SECTIONS_BY_ERROR_TYPE.items()
+}
+
+TEST_CREATOR_SYSTEM = """You are an expert at writing Python tests. Create simple test cases for the code you receive.
+
+Generate 2-3 simple test cases that verify the code works correctly.
+Format: Just provide the test code, no explanations."""
+
+REFACTOR_SYSTEM = """You are an expert at code refactoring. Improve the working code you receive.
+
+Make the code more:
+- Readable
+- Pythonic
+- Efficient
+
+Provide ONLY the refactored code, no explanations."""
+
+EXPLAINER_SYSTEM = """You are an expert at explaining code changes. Summarize what was fixed.
+
+Provide a clear, concise summary of:
+1. What was wrong
+2. What was fixed
+3. Why the fix works
+
+Keep it under 100 words."""
+
+
+class DebugState(TypedDict):
+    """State for the debugging agent system"""
+    code: str
+    error_message: str
+    error_type: str
+    traceback: str
+    execution_result: dict
+    version: int
+    patches: Annotated[list[dict], add]
+    messages: Annotated[Sequence[BaseMessage], add]
+    agent_outputs: Annotated[list[str], add]
+    current_agent: str
+    reasoning: str
+    needs_llm: bool
+    iterations: int
+    max_iterations: int
+    status: str  # "running", "success", "failed"
+    traces: Annotated[list[str], add]
+    code_hashes: set[str]
+    converged_failed: bool
+    stream: bool  # Stream tokens (SSE runs) vs batch across sessions
+
+
+class MultiAgentDebugger:
+    """Multi-agent system for code debugging using LangGraph"""
+
+    # Compiled graph shared across instances: the topology and model
+    # configuration are identical for every debugger, so recompiling the
+    # StateGraph per instantiation only wastes time and memory
+    _compiled_graph = None
+
+    def __init__(self, model_name: str = "codellama:7b", temperature: float = 0.1):
+        self.llm = ChatGroq(
+            model_name="llama-3.3-70b-versatile",
+            temperature=0.7
+        )
+        # Deterministic model for cacheable paths (interpreter/explainer):
+        # temperature=0 makes reusing a cached response safe
+        self.cached_llm = ChatGroq(
+            model_name="llama-3.3-70b-versatile",
+            temperature=0
+        )
+        self.cache = LLMCache()
+        # Batchers coalesce concurrent agent calls across sessions into
+        # single abatch requests (one per client, as temperature differs)
+        self.batcher = LLMBatcher(self.llm)
+        self.cached_batcher = LLMBatcher(self.cached_llm)
+        self.sandbox = SandboxExecutor()
+        self.rule_patcher = RuleBasedPatcher()
+        self.checkpointer = MemorySaver()
+        
+        # Build the agent graph once per class; later instances reuse it
+        if MultiAgentDebugger._compiled_graph is None:
+            MultiAgentDebugger._compiled_graph = self._build_graph()
+        self.graph = MultiAgentDebugger._compiled_graph
+    
+    def _build_graph(self) -> StateGraph:
+        """Build the LangGraph multi-agent system"""
+        workflow = StateGraph(DebugState)
+        
+        # Add agent nodes
+        workflow.add_node("rule_patcher", self._rule_patcher_agent)
+        workflow.add_node("error_interpreter", self._error_interpreter_agent)
+        workflow.add_node("patch_generator", self._patch_generator_agent)
+        workflow.add_node("validator", self._validator_agent)
+        workflow.add_node("test_creator", self._test_creator_agent)
+        workflow.add_node("refactor", self._refactor_agent)
+        workflow.add_node("explainer", self._explainer_agent)
+        
+        # Define the flow: cheap rule-based pre-pass first, LLM only on miss
+        workflow.add_edge(START, "rule_patcher")
+        workflow.add_conditional_edges(
+            "rule_patcher",
+            self._after_rule_patcher,
+            {
+                "validator": "validator",
+                "error_interpreter": "error_interpreter"
+            }
+        )
+        # Early abort: when the reviewer reports nothing to fix there is no
+        # point decoding a patch, validating, testing, or refactoring
+        workflow.add_conditional_edges(
+            "error_interpreter",
+            self._after_interpreter,
+            {
+                "patch_generator": "patch_generator",
+                "end": END
+            }
+        )
+        # Skip validation when the generator reproduces a previously seen
+        # patch — re-running it cannot succeed, so explain and stop
+        workflow.add_conditional_edges(
+            "patch_generator",
+            self._after_patch_generator,
+            {
+                "validator": "validator",
+                "explainer": "explainer"
+            }
+        )
+        
+        # Conditional edges: on success, fan out to test_creator and refactor
+        # in parallel (Send API); both feed explainer once their outputs merge
+        workflow.add_conditional_edges(
+            "validator",
+            self._should_continue,
+            {
+                "explainer": "explainer",
+                "end": END
+            }
+        )
+
+        workflow.add_edge("test_creator", "explainer")
+        workflow.add_edge("refactor", "explainer")
+        workflow.add_edge("explainer", END)
+        
+        return workflow.compile(checkpointer=self.checkpointer)
+    
+    @staticmethod
+    def _classify_error(error_type: str) -> ErrorType:
+        """Map the state's error_type string back onto the enum"""
+        try:
+            return ErrorType(error_type)
+        except ValueError:
+            return ErrorType.UNKNOWN
+
+    def _rule_patcher_agent(self, state: DebugState) -> dict:
+        """Pre-pass that applies rule-based fixes before any LLM call
+
+        Common errors (missing colon, ture/fasle typos, Python 2 print) are
+        fixable in microseconds; on a rule hit the graph skips straight to
+        the validator and the LLM round-trip never happens.
+        """
+        trace = "[Rule Patcher] Checking rule-based fixes"
+
+        # The logical-analysis path (successful execution) has no error
+        # message for the rules to match on
+        is_successful = state.get('execution_result', {}).get('status') == 'success'
+        if is_successful or not state.get('error_message'):
+            return {
+                "current_agent": "rule_patcher",
+                "needs_llm": True,
+                "traces": [trace + " - skipped (no runtime error)"]
+            }
+
+        fixed_code, reasoning = self.rule_patcher.try_patch(
+            state['code'], state['error_message']
+        )
+        if fixed_code is None:
+            return {
+                "current_agent": "rule_patcher",
+                "needs_llm": True,
+                "traces": [trace + " - no rule matched"]
+            }
+
+        patch = {
+            "patch_id": uuid.uuid4().hex,
+            "version_from": state['version'],
+            "version_to": state['version'] + 1,
+            "source": PatchSource.RULE_BASED.value,
+            "reasoning": reasoning,
+            "diff": self._generate_diff(state['code'], fixed_code),
+            "applied": False,
+            "fixed_code": fixed_code
+        }
+
+        return {
+            "code": fixed_code,
+            "version": state['version'] + 1,
+            "patches": [patch],
+            "current_agent": "rule_patcher",
+            "reasoning": reasoning,
+            "needs_llm": False,
+            "traces": [trace + f" - HIT: {reasoning}"]
+        }
+
+    def _after_patch_generator(self, state: DebugState) -> str:
+        """Route duplicate patches straight to the explainer"""
+        return "explainer" if state.get("converged_failed") else "validator"
+
+    def _after_rule_patcher(self, state: DebugState) -> str:
+        """Route to the validator on a rule hit, otherwise to the LLM path"""
+        return "error_interpreter" if state.get("needs_llm", True) else "validator"
+
+    def _after_interpreter(self, state: DebugState) -> str:
+        """End the run when logical analysis reports the code is correct
+
+        The logic-review prompt instructs the model to answer
+        "NONE - Code is correct" for clean code; that verdict arrives in
+        the first tokens of the analysis, so stopping here saves the whole
+        patch-generation and validation tail.
+        """
+        is_successful = state.get('execution_result', {}).get('status') == 'success'
+        if is_successful:
+            reasoning = (state.get('reasoning') or '').lstrip()
+            if reasoning.upper().startswith('NONE'):
+                return "end"
+        return "patch_generator"
+
+    async def _error_interpreter_agent(self, state: DebugState) -> dict:
+        """Agent that interprets and categorizes errors"""
+        
+        # Check if this is successful execution that needs logical analysis
+        is_successful = state.get('execution_result', {}).get('status') == 'success'
+        
+        if is_successful:
+            trace = f"[Error Interpreter] Analyzing successful code for logical errors"
+
+            system = INTERPRETER_LOGIC_SYSTEM
+            prompt = f"""CODE THAT WAS EXECUTED:
+```python
+{state['code']}
+```
+
+EXECUTION OUTPUT:
+Stdout: {state.get('execution_result', {}).get('stdout', '')}
+Stderr: {state.get('execution_result', {}).get('stderr', '')}
+Exit Code: {state.get('execution_result', {}).get('exit_code', 0)}"""
+        else:
+            trace = f"[Error Interpreter] Analyzing error: {state['error_type']}"
+
+            system = INTERPRETER_ERROR_SYSTEMS.get(
+                self._classify_error(state.get('error_type', '')),
+                INTERPRETER_ERROR_SYSTEM
+            )
+            prompt = f"""CODE THAT WAS EXECUTED:
+```python
+{state['code']}
+```
+
+EXECUTION RESULT:
+Error Type: {state['error_type']}
+Error Message: {state['error_message']}
+
+Full Traceback:
+{state['traceback']}"""
+
+        messages = [SystemMessage(content=system), HumanMessage(content=prompt)]
+        response = await self.cache.aget_or_call(
+            "error_interpreter",
+            state.get('error_type', 'logical'),
+            state['code'],
+            lambda: self.cached_batcher.submit(messages)
+        )
+
+        reasoning = response.content
+        
+        return {
+            "messages": messages + [response],
+            "current_agent": "error_interpreter",
+            "reasoning": reasoning,
+            "traces": [trace]
+        }
+    
+    async def _patch_generator_agent(self, state: DebugState) -> dict:
+        """Agent that generates code patches"""
+        trace = f"[Patch Generator] Generating patch for version {state['version']}"
+        
+        # Check if analyzing successful code for logical errors
+        is_successful = state.get('execution_result', {}).get('status') == 'success'
         
+        if is_successful:
+            system = PATCH_LOGIC_SYSTEM
+            prompt = f"""ORIGINAL CODE (executed successfully but has logical errors):
+```python
+{state['code']}
+```
+
+EXECUTION OUTPUT:
+{state.get('execution_result', {}).get('stdout', '')}
+
+LOGICAL ERROR ANALYSIS:
+{state['reasoning']}
+
+FIXED CODE:"""
+        else:
+            system = PATCH_ERROR_SYSTEMS.get(
+                self._classify_error(state.get('error_type', '')),
+                PATCH_ERROR_SYSTEM
+            )
+            prompt = f"""ORIGINAL CODE (that failed):
+```python
+{state['code']}
+```
+
+ERROR THAT OCCURRED:
+{state['error_message']}
+
+TRACEBACK:
+{state['traceback']}
+
+ERROR ANALYSIS:
+{state['reasoning']}
+
+FIXED CODE:"""
+
+        messages = [SystemMessage(content=system), HumanMessage(content=prompt)]
+        response = await self.cache.aget_or_call(
+            "patch_generator",
+            state.get('error_type', 'logical'),
+            state['code'],
+            # SSE runs stream the patch token-by-token for live progress;
+            # background debug loops instead coalesce into the shared
+            # batcher so concurrent sessions share one model call
+            lambda: self._stream_response(self.llm, messages)
+            if state.get('stream')
+            else self.batcher.submit(messages)
+        )
+
         # Extract code from response
         fixed_code = self._extract_code(response.content, state['code'])
-        
+
+        # Detect convergence failure: a patch identical to one already
+        # tried can only fail again, so abort before wasting more LLM calls
+        code_hash = hashlib.blake2b(
+            fixed_code.encode('utf-8'), digest_size=8
+        ).hexdigest()
+        seen_hashes = state.get('code_hashes') or set()
+        if code_hash in seen_hashes:
+            return {
+                "current_agent": "patch_generator",
+                "status": "failed",
+                "converged_failed": True,
+                "traces": [trace + " - duplicate patch, aborting"]
+            }
+
         # Generate diff
         diff = self._generate_diff(state['code'], fixed_code)
         
         patch = {
-            "patch_id": str(uuid.uuid4()),
+            "patch_id": uuid.uuid4().hex,
             "version_from": state['version'],
             "version_to": state['version'] + 1,
             "source": PatchSource.LLM_PATCH_GENERATOR.value,
@@ -384,170 +644,189 @@ FIXED CODE:"""
         return {
             "code": fixed_code,
             "version": state['version'] + 1,
-            "patches": state.get("patches", []) + [patch],
+            "patches": [patch],
             "messages": messages + [response],
             "current_agent": "patch_generator",
-            "traces": state.get("traces", []) + [trace]
+            "code_hashes": seen_hashes | {code_hash},
+            "traces": [trace]
         }
     
-    def _validator_agent(self, state: DebugState) -> dict:
+    async def _validator_agent(self, state: DebugState) -> dict:
         """Agent that validates the patched code"""
         trace = f"[Validator] Validating patched code version {state['version']}"
-        
-        # Execute the patched code
-        result = self.sandbox.execute(state['code'])
-        
+
+        # Execute the patched code off the event loop: the Docker subprocess
+        # call blocks for the full execution otherwise, starving concurrent
+        # sessions
+        result = await asyncio.to_thread(self.sandbox.execute, state['code'])
+
         execution_dict = {
             "stdout": result.stdout,
             "stderr": result.stderr,
             "exit_code": result.exit_code,
             "status": result.status.value
         }
-        
-        if result.status.value == "success":
+
+        if result.status is _SUCCESS:
             status = "success"
             trace += " - PASSED ✓"
         else:
             status = "running"
             trace += " - FAILED ✗"
+            error_type_str = result.error_type.value if result.error_type else "unknown"
             # Update error information for next iteration
             return {
                 "execution_result": execution_dict,
                 "error_message": result.error_message or "",
-                "error_type": result.error_type.value if result.error_type else "unknown",
+                "error_type": error_type_str,
                 "traceback": result.traceback or "",
                 "current_agent": "validator",
                 "status": status,
                 "iterations": state.get("iterations", 0) + 1,
-                "traces": state.get("traces", []) + [trace]
+                "traces": [trace]
             }
-        
+
         return {
             "execution_result": execution_dict,
             "current_agent": "validator",
             "status": status,
-            "traces": state.get("traces", []) + [trace]
+            "traces": [trace]
         }
-    
-    def _test_creator_agent(self, state: DebugState) -> dict:
+
+    async def _test_creator_agent(self, state: DebugState) -> dict:
         """Agent that creates test cases for the fixed code"""
         trace = f"[Test Creator] Generating test cases"
-        
-        prompt = f"""You are an expert at writing Python tests. Create simple test cases for this code.
 
-Code:
+        prompt = f"""Code:
 ```python
 {state['code']}
-```
+```"""
 
-Generate 2-3 simple test cases that verify the code works correctly.
-Format: Just provide the test code, no explanations."""
+        messages = [SystemMessage(content=TEST_CREATOR_SYSTEM), HumanMessage(content=prompt)]
+        response = await self.batcher.submit(messages)
 
-        messages = [HumanMessage(content=prompt)]
-        response = self.llm.invoke(messages)
-        
         return {
             "messages": messages + [response],
-            "current_agent": "test_creator",
-            "traces": state.get("traces", []) + [trace]
+            "agent_outputs": [response.content],
+            "traces": [trace]
         }
-    
-    def _refactor_agent(self, state: DebugState) -> dict:
+
+    async def _refactor_agent(self, state: DebugState) -> dict:
         """Agent that refactors and optimizes the fixed code"""
         trace = f"[Refactor] Optimizing code"
-        
-        prompt = f"""You are an expert at code refactoring. Improve this working code.
 
-Code:
+        prompt = f"""Code:
 ```python
 {state['code']}
-```
-
-Make the code more:
-- Readable
-- Pythonic
-- Efficient
-
-Provide ONLY the refactored code, no explanations."""
+```"""
+
+        messages = [SystemMessage(content=REFACTOR_SYSTEM), HumanMessage(content=prompt)]
+        response = await self.cache.aget_or_call(
+            "refactor",
+            state.get('error_type', 'logical'),
+            state['code'],
+            lambda: self.batcher.submit(messages)
+        )
 
-        messages = [HumanMessage(content=prompt)]
-        response = self.llm.invoke(messages)
-        
         refactored_code = self._extract_code(response.content, state['code'])
-        
+
         return {
             "code": refactored_code,
             "messages": messages + [response],
-            "current_agent": "refactor",
-            "traces": state.get("traces", []) + [trace]
+            "agent_outputs": [response.content],
+            "traces": [trace]
         }
     
-    def _explainer_agent(self, state: DebugState) -> dict:
+    async def _explainer_agent(self, state: DebugState) -> dict:
         """Agent that generates human-readable explanations"""
         trace = f"[Explainer] Generating explanation"
-        
-        prompt = f"""You are an expert at explaining code changes. Summarize what was fixed.
 
-Original Error: {state['error_message']}
-Number of patches applied: {len(state.get('patches', []))}
-Final Status: {state['status']}
-
-Provide a clear, concise summary of:
-1. What was wrong
-2. What was fixed
-3. Why the fix works
-
-Keep it under 100 words."""
+        # Rule-based fixes carry deterministic reasoning already — build the
+        # summary from a template and skip the ~1s LLM call entirely
+        patches = state.get('patches', [])
+        if patches and all(
+            p.get('source') == PatchSource.RULE_BASED.value for p in patches
+        ):
+            summary = (
+                f"Fixed {len(patches)} rule-based issue(s): "
+                f"{', '.join(p['reasoning'] for p in patches)}. "
+                "Code now runs successfully."
+            )
+            return {
+                "current_agent": "explainer",
+                "reasoning": state.get("reasoning", "") + "\n\n" + summary,
+                "traces": [trace + " - templated (rule-based fixes only)"]
+            }
 
-        messages = [HumanMessage(content=prompt)]
-        response = self.llm.invoke(messages)
+        prompt = f"""Original Error: {state['error_message']}
+Number of patches applied: {len(state.get('patches', []))}
+Final Status: {state['status']}"""
+
+        messages = [SystemMessage(content=EXPLAINER_SYSTEM), HumanMessage(content=prompt)]
+        response = await self.cache.aget_or_call(
+            "explainer",
+            state.get('error_type', 'logical'),
+            state['code'],
+            # Stream for SSE consumers; batch for background sessions
+            lambda: self._stream_response(self.cached_llm, messages)
+            if state.get('stream')
+            else self.cached_batcher.submit(messages)
+        )
         
         return {
             "messages": messages + [response],
             "current_agent": "explainer",
             "reasoning": state.get("reasoning", "") + "\n\n" + response.content,
-            "traces": state.get("traces", []) + [trace]
+            "traces": [trace]
         }
     
-    def _should_continue(self, state: DebugState) -> str:
-        """Decide which agent to call next"""
-        # If successful, move to explainer
+    def _should_continue(self, state: DebugState):
+        """Decide which agent(s) to call next"""
+        # If successful, fan out to the independent test_creator and refactor
+        # agents in parallel; both converge on explainer. Each branch gets
+        # its own state snapshot so neither can observe the other's writes
+        # mid-flight
         if state.get("status") == "success":
-            return "explainer"
-        
+            return [Send("test_creator", dict(state)), Send("refactor", dict(state))]
+
         # If max iterations reached, explain and end
         if state.get("iterations", 0) >= state.get("max_iterations", 10):
             return "explainer"
-        
+
         # If still running and within iterations, continue with error interpreter
         # (This will restart the loop)
         return "end"
     
+    async def _stream_response(self, llm, messages) -> AIMessage:
+        """Invoke the LLM in streaming mode and accumulate the chunks
+
+        Streaming cuts user-perceived latency to time-to-first-token: the
+        chunks surface through graph.astream_events for SSE consumers while
+        callers here still receive the complete message.
+        """
+        chunks = []
+        async for chunk in llm.astream(messages):
+            if chunk.content:
+                chunks.append(chunk.content)
+        return AIMessage(content=''.join(chunks))
+
     def _extract_code(self, response: str, fallback: str) -> str:
         """Extract Python code from LLM response"""
         # Try to extract code from markdown code blocks
-        import re
-        
-        # Pattern for ```python ... ``` or ``` ... ```
-        patterns = [
-            r'```python\n(.*?)\n```',
-            r'```\n(.*?)\n```',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, response, re.DOTALL)
+        for pattern in _CODE_BLOCK_PATTERNS:
+            match = pattern.search(response)
             if match:
                 return match.group(1).strip()
-        
+
         # If no code block found, assume entire response is code
         # Remove common non-code prefixes
         lines = response.strip().split('\n')
         code_lines = []
         in_code = False
-        
+
         for line in lines:
             # Skip explanation lines
-            if any(line.startswith(prefix) for prefix in ['Here', 'The', 'This', 'I ', 'Fixed']):
+            if line.startswith(_EXPLANATION_PREFIXES):
                 continue
             if line.strip():
                 in_code = True
@@ -560,12 +839,10 @@ Keep it under 100 words."""
         return fallback
     
     def _generate_diff(self, original: str, modified: str) -> str:
-        """Generate unified diff"""
-        diff = difflib.unified_diff(
-            original.splitlines(keepends=True),
-            modified.splitlines(keepends=True),
-            fromfile='original',
-            tofile='modified',
-            lineterm=''
-        )
-        return ''.join(diff)
+        """Generate unified diff
+
+        Delegates to the rule patcher's prefix/suffix-trim implementation:
+        O(N) with a single minimal hunk for the localized edits both the
+        rule and LLM paths typically produce, difflib only for wide spans.
+        """
+        return self.rule_patcher._generate_diff(original, modified)
@@ -20,7 +20,7 @@ class Settings(BaseSettings):
     ollama_base_url: str = "http://localhost:11434"
     
     # Debugging Settings
-    max_iterations: int = 10
+    max_iterations: int = 5
     execution_timeout: int = 10  # seconds
     
     # Docker Settings
@@ -28,6 +28,8 @@ class Settings(BaseSettings):
     
     # Logging
     log_level: str = "INFO"
+    # Session trace collection; disabling skips trace formatting entirely
+    trace_enabled: bool = True
     
     class Config:
         env_file = ".env"
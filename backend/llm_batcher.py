@@ -0,0 +1,67 @@
+"""Batching dispatcher for concurrent LLM agent calls
+
+Under concurrent load each debug session used to issue its own LLM
+round-trip, paying HTTP and tokenizer overhead per call. The batcher
+coalesces calls that arrive within a short window into a single
+``llm.abatch`` request, so throughput scales with batch size until the
+provider saturates. Callers just ``await batcher.submit(messages)`` and
+get their individual response back.
+"""
+import asyncio
+from typing import Optional, Sequence
+
+from langchain_core.messages import BaseMessage
+
+
+class LLMBatcher:
+    """Coalesces concurrent LLM calls into batched abatch requests"""
+
+    def __init__(self, llm, max_batch: int = 16, max_wait_ms: int = 25):
+        self.llm = llm
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, messages: Sequence[BaseMessage]):
+        """Queue one prompt and await its response from the next batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._ensure_worker()
+        await self._queue.put((messages, future))
+        return await future
+
+    def _ensure_worker(self):
+        """Start the background dispatch task on first use"""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def _dispatch(self):
+        """Collect queued prompts for up to max_wait, then fire one batch"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            # Give concurrent callers a brief window to join this batch
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), remaining)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            prompts = [messages for messages, _ in batch]
+            try:
+                responses = await self.llm.abatch(prompts)
+                for (_, future), response in zip(batch, responses):
+                    if not future.done():
+                        future.set_result(response)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
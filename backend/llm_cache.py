@@ -0,0 +1,110 @@
+"""Persistent response cache for LLM agent calls
+
+Debugging sessions frequently repeat near-identical errors (the same
+IndexError pattern, the same off-by-one bug), so agent prompts recur with
+only cosmetic differences. The cache normalizes the submitted code via the
+AST (stripping whitespace, comments, and formatting noise) and keys entries
+on (agent_name, error_type, normalized code hash), turning a multi-second
+LLM round-trip into a millisecond SQLite lookup on repeats. Entries are
+persisted to SQLite so the cache survives restarts, and expire after a TTL.
+"""
+import ast
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from langchain_core.messages import AIMessage
+
+
+class LLMCache:
+    """SQLite-backed cache keyed by (agent_name, error_type, normalized code)"""
+
+    def __init__(self, db_path: str = ".llm_cache.db", ttl: int = 3600):
+        self.db_path = str(Path(db_path))
+        self.ttl = ttl
+        self._init_db()
+
+    def _init_db(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+
+    @staticmethod
+    def _normalize_code(code: str) -> str:
+        """Canonicalize code so formatting/comment differences share a key"""
+        try:
+            return ast.unparse(ast.parse(code))
+        except SyntaxError:
+            # Broken code can't round-trip the AST; fall back to stripping
+            # blank lines and trailing whitespace
+            return '\n'.join(
+                line.rstrip() for line in code.splitlines() if line.strip()
+            )
+
+    def _make_key(self, agent_name: str, error_type: str, code: str) -> str:
+        normalized = self._normalize_code(code)
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{agent_name}:{error_type}:{digest}"
+
+    def get(self, agent_name: str, error_type: str, code: str) -> Optional[str]:
+        """Return the cached response content, or None on miss/expiry"""
+        key = self._make_key(agent_name, error_type, code)
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE cache_key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if time.time() - created_at > self.ttl:
+                conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+                return None
+            return response
+
+    def put(self, agent_name: str, error_type: str, code: str, response: str):
+        """Store a response for this (agent, error, code) combination"""
+        key = self._make_key(agent_name, error_type, code)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (cache_key, response, created_at) "
+                "VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+
+    def get_or_call(
+        self,
+        agent_name: str,
+        error_type: str,
+        code: str,
+        call: Callable[[], AIMessage]
+    ) -> AIMessage:
+        """Return the cached response or invoke the LLM and cache the result"""
+        cached = self.get(agent_name, error_type, code)
+        if cached is not None:
+            return AIMessage(content=cached)
+        response = call()
+        self.put(agent_name, error_type, code, response.content)
+        return response
+
+    async def aget_or_call(
+        self,
+        agent_name: str,
+        error_type: str,
+        code: str,
+        call: Callable[[], Awaitable[AIMessage]]
+    ) -> AIMessage:
+        """Async variant of get_or_call for agents using ainvoke"""
+        cached = self.get(agent_name, error_type, code)
+        if cached is not None:
+            return AIMessage(content=cached)
+        response = await call()
+        self.put(agent_name, error_type, code, response.content)
+        return response
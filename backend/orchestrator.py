@@ -2,18 +2,127 @@
 Hybrid debugging orchestrator that combines rule-based and LLM-based approaches
 Tries rule-based fixes first, then escalates to LLM agents
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from collections import OrderedDict
 from datetime import datetime
+from pathlib import Path
+import ast
+import asyncio
+import difflib
+import hashlib
+import itertools
+import re
+import time
 import uuid
 
 from .models import (
     DebugSession, CodeVersion, Patch, ExecutionResult,
     ExecutionStatus, PatchSource, ErrorType
 )
+from .config import settings
 from .sandbox_executor import SandboxExecutor
 from .rule_based_patcher import RuleBasedPatcher
 from .agents import MultiAgentDebugger
 
+# File paths and line numbers vary between runs of semantically identical
+# errors; strip them so those errors share a fix-cache key
+_ERROR_LOCATION_RE = re.compile(r'File "[^"]+"|line \d+')
+
+# Unified diff hunk header, e.g. "@@ -3,7 +3,8 @@"
+_HUNK_HEADER_RE = re.compile(r'^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@')
+
+
+class _SmellVisitor(ast.NodeVisitor):
+    """Collects cheap-to-detect code smells for the static pre-check"""
+
+    def __init__(self):
+        self.smells: list[str] = []
+        self.stored_names: Dict[str, int] = {}
+        self.loaded_names: set = set()
+
+    def visit_ExceptHandler(self, node):
+        if node.type is None:
+            self.smells.append(f"bare except at line {node.lineno}")
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        defaults = list(node.args.defaults) + [
+            d for d in node.args.kw_defaults if d is not None
+        ]
+        for default in defaults:
+            if isinstance(default, (ast.List, ast.Dict, ast.Set)):
+                self.smells.append(
+                    f"mutable default argument in '{node.name}' at line {node.lineno}"
+                )
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Store):
+            self.stored_names.setdefault(node.id, node.lineno)
+        elif isinstance(node.ctx, ast.Load):
+            self.loaded_names.add(node.id)
+        self.generic_visit(node)
+
+
+def _share_result_strings(new: ExecutionResult, prev: Optional[ExecutionResult]):
+    """Alias equal output strings between consecutive execution results
+
+    Failing iterations often reproduce byte-identical stdout/stderr/
+    tracebacks; pointing the new result at the previous version's string
+    objects keeps one copy alive instead of one per retained CodeVersion.
+    """
+    if prev is None:
+        return
+    for field in ("stdout", "stderr", "traceback", "error_message"):
+        new_val = getattr(new, field)
+        prev_val = getattr(prev, field)
+        if new_val is not prev_val and new_val == prev_val:
+            setattr(new, field, prev_val)
+
+
+def _ensure_ast(version: CodeVersion) -> Optional[ast.Module]:
+    """Parse the version's code once, caching the tree on the version
+
+    Subsequent consumers (static pre-check, future AST-based passes) reuse
+    the cached tree instead of re-running the O(L) CPython parse. A syntax
+    failure is cached too, so broken code is not re-parsed either.
+    """
+    if version.ast_tree is None and version.syntax_error is None:
+        try:
+            version.ast_tree = ast.parse(version.code)
+        except SyntaxError as e:
+            version.syntax_error = str(e)
+    return version.ast_tree
+
+
+def _static_smells(version: CodeVersion) -> list[str]:
+    """Cheap AST pass for obvious issues in code that already runs
+
+    Returns an empty list for clean code, letting the debug loop finish
+    without an LLM round trip. Syntax errors return no smells: code that
+    reaches this check has already executed successfully.
+    """
+    tree = _ensure_ast(version)
+    if tree is None:
+        return []
+    visitor = _SmellVisitor()
+    visitor.visit(tree)
+    for name, lineno in visitor.stored_names.items():
+        if name not in visitor.loaded_names and not name.startswith('_'):
+            visitor.smells.append(f"variable '{name}' assigned at line {lineno} but never used")
+    return visitor.smells
+
+
+def _code_hash(code: str) -> str:
+    """Short content hash for duplicate-patch detection
+
+    Matches the digest the patch generator agent uses so hashes seeded
+    into the agent state and hashes computed here are interchangeable.
+    """
+    return hashlib.blake2b(code.encode('utf-8'), digest_size=8).hexdigest()
+
 
 class HybridDebugOrchestrator:
     """
@@ -25,16 +134,52 @@ class HybridDebugOrchestrator:
     5. Repeat until success or max iterations
     """
     
+    # Bound on the cross-session LLM-fix cache
+    _FIX_CACHE_MAX = 256
+
+    # Completed sessions past this count are evicted oldest-first and
+    # spilled to this directory for on-demand rehydration
+    _SESSIONS_MAX = 1000
+    _SESSIONS_DIR = Path("sessions")
+
     def __init__(self, llm_model: str = "codellama:7b"):
         self.sandbox = SandboxExecutor()
         self.rule_patcher = RuleBasedPatcher()
         self.llm_debugger = MultiAgentDebugger(model_name=llm_model)
-        self.sessions: Dict[str, DebugSession] = {}
+        # Insertion-ordered so eviction can pop oldest-first; get_session
+        # refreshes recency and rehydrates evicted sessions from disk
+        self.sessions: "OrderedDict[str, DebugSession]" = OrderedDict()
+        # LRU of (code, error) -> (Patch, fixed_code) so identical failures
+        # across sessions skip the multi-second agent pass
+        self._fix_cache: OrderedDict[str, Tuple[Patch, str]] = OrderedDict()
+        # Execution results from speculative sandbox runs, keyed by the code
+        # that was run; _debug_loop consumes these instead of re-executing
+        self._speculated: Dict[str, ExecutionResult] = {}
+        # In-flight LLM fixes keyed like the fix cache; concurrent identical
+        # requests share one future instead of duplicating the call
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Graph thread_ids are never persisted or user-facing, so a cheap
+        # counter beats a urandom-backed UUID per LLM invocation
+        self._thread_counter = itertools.count()
+        # Last observed status fingerprint and when it changed, per session;
+        # drives the polling-backoff hint in get_session_status
+        self._status_seen: Dict[str, Tuple[tuple, float]] = {}
     
+    @staticmethod
+    def _trace(session: DebugSession, fmt: str, *args):
+        """Append a session trace, formatting lazily
+
+        %-style args are only interpolated when tracing is enabled, so
+        disabling traces skips the string work entirely rather than
+        formatting and discarding.
+        """
+        if settings.trace_enabled:
+            session.traces.append(fmt % args if args else fmt)
+
     async def start_debug_session(
         self,
         code: str,
-        max_iterations: int = 10
+        max_iterations: int = 5
     ) -> DebugSession:
         """
         Start a new debugging session
@@ -46,7 +191,7 @@ class HybridDebugOrchestrator:
         Returns:
             DebugSession object with session_id
         """
-        session_id = str(uuid.uuid4())
+        session_id = uuid.uuid4().hex
         
         # Create initial session
         session = DebugSession(
@@ -64,21 +209,42 @@ class HybridDebugOrchestrator:
             timestamp=datetime.now()
         )
         
+        # Attach a long-lived container so every iteration of this session
+        # execs into it rather than paying container create/destroy; the
+        # docker CLI call blocks, so keep it off the event loop
+        session.sandbox_handle = await asyncio.to_thread(self.sandbox.create_container)
+
         # Execute initial code
-        result = self.sandbox.execute(code)
+        result = await self._session_execute(session, code)
         initial_version.execution_result = result
         
         session.versions.append(initial_version)
-        session.traces.append(f"[Session Created] ID: {session_id}")
-        session.traces.append(f"[Initial Execution] Status: {result.status.value}")
+        self._trace(session, "[Session Created] ID: %s", session_id)
+        self._trace(session, "[Initial Execution] Status: %s", result.status.value)
         
-        # Store session
+        # Store session, evicting old completed sessions so memory stays
+        # bounded under sustained traffic (each session pins its versions,
+        # traces, and execution output)
         self.sessions[session_id] = session
+        if len(self.sessions) > self._SESSIONS_MAX:
+            evicted = []
+            for sid, old in list(self.sessions.items()):
+                if old.status != "running":
+                    del self.sessions[sid]
+                    self._status_seen.pop(sid, None)
+                    evicted.append(old)
+                    if len(self.sessions) <= self._SESSIONS_MAX:
+                        break
+            if evicted:
+                # Spill to disk off-loop; get_session rehydrates on demand
+                asyncio.create_task(
+                    asyncio.to_thread(self._persist_sessions, evicted)
+                )
         
         # Always run debug loop, even if code executes successfully
         # This catches logical errors, suboptimal code, etc.
         if result.status == ExecutionStatus.SUCCESS:
-            session.traces.append("[Analysis] Code executed successfully, but analyzing for logical errors...")
+            self._trace(session, "[Analysis] Code executed successfully, but analyzing for logical errors...")
         
         # Return session immediately - debug loop will run separately
         return session
@@ -87,7 +253,22 @@ class HybridDebugOrchestrator:
         """Run the debug loop for an existing session (for background tasks)"""
         session = self.sessions.get(session_id)
         if session and session.status == "running":
-            await self._debug_loop(session)
+            try:
+                await self._debug_loop(session)
+            finally:
+                # The session is finished either way; release its container
+                # without blocking the event loop on the docker CLI
+                if session.sandbox_handle:
+                    await asyncio.to_thread(
+                        self.sandbox.remove_container, session.sandbox_handle
+                    )
+                    session.sandbox_handle = None
+
+    async def _session_execute(self, session: DebugSession, code: str) -> ExecutionResult:
+        """Run code in the session's container, or the shared pool without one"""
+        if session.sandbox_handle:
+            return await self.sandbox.arun_in(session.sandbox_handle, code)
+        return await self.sandbox.aexecute(code)
     
     async def _debug_loop(self, session: DebugSession):
         """
@@ -112,63 +293,102 @@ class HybridDebugOrchestrator:
                 session.status = "success"
                 session.final_code = current_version.code
                 session.completed_at = datetime.now()
-                session.traces.append(f"[Success] Code fixed in {session.current_iteration - 1} iterations!")
+                self._trace(session, "[Success] Code fixed in %d iterations!", session.current_iteration - 1)
                 break
             
             # Log current status
             if exec_result:
-                session.traces.append(
-                    f"[Iteration {session.current_iteration}] "
-                    f"Status: {exec_result.status.value}, "
-                    f"Error: {exec_result.error_type.value if exec_result.error_type else 'none'}"
+                self._trace(
+                    session,
+                    "[Iteration %d] Status: %s, Error: %s",
+                    session.current_iteration,
+                    exec_result.status.value,
+                    exec_result.error_type.value if exec_result.error_type else 'none'
                 )
             else:
-                session.traces.append(f"[Iteration {session.current_iteration}] No execution result")
+                self._trace(session, "[Iteration %d] No execution result", session.current_iteration)
             
             # Step 1: Determine strategy
             patch = None
             fixed_code = None
-            
-            # If first iteration and code runs successfully, always use LLM for analysis
+
+            # Hashes of every code version already tried this session; the
+            # agent pass aborts early on a duplicate, and the check below
+            # catches duplicates from the rule patcher and fix cache too
+            seen_hashes = {_code_hash(v.code) for v in session.versions}
+
+            # If first iteration and code runs successfully, gate the LLM
+            # analysis behind a cheap static pre-check: clean code finishes
+            # here with one ast.parse instead of a multi-second LLM call
             if session.current_iteration == 1 and exec_result and exec_result.status == ExecutionStatus.SUCCESS:
-                session.traces.append("[Strategy] First execution successful - analyzing with LLM for logical errors...")
+                smells = await asyncio.to_thread(_static_smells, current_version)
+                if not smells:
+                    self._trace(session, "[Analysis] Static pre-check found no issues - code verified")
+                    session.status = "success"
+                    session.final_code = current_version.code
+                    session.completed_at = datetime.now()
+                    break
+                self._trace(
+                    session,
+                    "[Strategy] Static pre-check flagged: %s - analyzing with LLM...",
+                    "; ".join(smells)
+                )
                 patch, fixed_code = await self._llm_fix(
                     current_version.code,
-                    exec_result,
-                    session.current_version
+                    exec_result.model_copy(update={
+                        "error_message": "Static analysis flagged: " + "; ".join(smells)
+                    }),
+                    session.current_version,
+                    seen_hashes
                 )
-            # Otherwise, try rule-based fix first
+            # Otherwise, try rule-based and LLM fixes speculatively in
+            # parallel: the rule patcher finishes in microseconds, so on a
+            # hit we cancel the in-flight LLM call, and on a miss the LLM
+            # pass has already been running instead of starting cold
             elif exec_result and exec_result.error_message:
-                session.traces.append("[Strategy] Attempting rule-based fix...")
-                patch = self.rule_patcher.generate_patch(
+                self._trace(session, "[Strategy] Attempting rule-based fix (LLM running speculatively)...")
+                llm_task = asyncio.create_task(self._llm_fix(
+                    current_version.code,
+                    exec_result,
+                    session.current_version,
+                    seen_hashes
+                ))
+                patch = await asyncio.to_thread(
+                    self.rule_patcher.generate_patch,
                     exec_result.error_message,
                     current_version.code,
                     session.current_version
                 )
                 if patch:
-                    # For rule-based patches, extract fixed code from diff
-                    fixed_code = self._apply_patch(current_version.code, patch)
-                
-                # Step 2: If rule-based fails, use LLM
-                if not patch:
-                    session.traces.append("[Strategy] Rule-based fix not applicable, using LLM agents...")
-                    patch, fixed_code = await self._llm_fix(
-                        current_version.code,
-                        exec_result,
-                        session.current_version
+                    # For rule-based patches, extract fixed code from diff;
+                    # the diff-parsing fallback is CPU-bound, so keep it off
+                    # the event loop alongside the rule patcher
+                    fixed_code = await asyncio.to_thread(
+                        self._apply_patch, current_version.code, patch
                     )
+                    llm_task.cancel()
+                else:
+                    self._trace(session, "[Strategy] Rule-based fix not applicable, using LLM agents...")
+                    patch, fixed_code = await llm_task
             else:
                 # No error message and not first iteration - shouldn't happen
-                session.traces.append("[Warning] No error to fix and not first iteration")
+                self._trace(session, "[Warning] No error to fix and not first iteration")
                 session.status = "success"
                 session.final_code = current_version.code
                 session.completed_at = datetime.now()
                 break
             
             # Step 3: Apply patch if generated
+            if patch and fixed_code and _code_hash(fixed_code) in seen_hashes:
+                # A patch identical to a version already tried can only
+                # fail the same way again; stop instead of looping on it
+                self._trace(session, "[Failed] Patch repeats an already-tried version, aborting")
+                session.status = "failed"
+                session.completed_at = datetime.now()
+                break
             if patch and fixed_code:
-                session.traces.append(f"[Patch Generated] Source: {patch.source.value}")
-                session.traces.append(f"[Reasoning] {patch.reasoning}")
+                self._trace(session, "[Patch Generated] Source: %s", patch.source.value)
+                self._trace(session, "[Reasoning] %s", patch.reasoning)
                 
                 # Use the fixed code directly
                 new_code = fixed_code
@@ -182,9 +402,13 @@ class HybridDebugOrchestrator:
                     timestamp=datetime.now()
                 )
                 
-                # Execute new version
-                session.traces.append(f"[Execution] Testing version {new_version.version}...")
-                new_result = self.sandbox.execute(new_code)
+                # Execute new version, reusing a speculative run if the LLM
+                # pass already executed this exact code
+                self._trace(session, "[Execution] Testing version %d...", new_version.version)
+                new_result = self._speculated.pop(new_code, None)
+                if new_result is None:
+                    new_result = await self._session_execute(session, new_code)
+                _share_result_strings(new_result, exec_result)
                 new_version.execution_result = new_result
                 
                 session.versions.append(new_version)
@@ -195,24 +419,20 @@ class HybridDebugOrchestrator:
                     session.status = "success"
                     session.final_code = new_code
                     session.completed_at = datetime.now()
-                    session.traces.append(
-                        f"[Success] Code fixed! Final version: {new_version.version}"
-                    )
+                    self._trace(session, "[Success] Code fixed! Final version: %d", new_version.version)
                     break
                 else:
-                    session.traces.append(
-                        f"[Continue] Still has errors, continuing to iteration {session.current_iteration + 1}..."
-                    )
+                    self._trace(session, "[Continue] Still has errors, continuing to iteration %d...", session.current_iteration + 1)
             else:
                 # No patch generated
                 # If this was first iteration with successful code, LLM verified it's correct
                 if session.current_iteration == 1 and exec_result and exec_result.status == ExecutionStatus.SUCCESS:
-                    session.traces.append("[Analysis Complete] LLM verified code is logically correct")
+                    self._trace(session, "[Analysis Complete] LLM verified code is logically correct")
                     session.status = "success"
                     session.final_code = current_version.code
                     session.completed_at = datetime.now()
                 else:
-                    session.traces.append("[Failed] Unable to generate patch")
+                    self._trace(session, "[Failed] Unable to generate patch")
                     session.status = "failed"
                     session.completed_at = datetime.now()
                 break
@@ -221,64 +441,206 @@ class HybridDebugOrchestrator:
         if session.current_iteration >= session.max_iterations and session.status == "running":
             session.status = "max_iterations"
             session.completed_at = datetime.now()
-            session.traces.append(
-                f"[Max Iterations] Reached maximum of {session.max_iterations} iterations"
-            )
+            self._trace(session, "[Max Iterations] Reached maximum of %d iterations", session.max_iterations)
     
+    def _build_agent_state(
+        self,
+        code: str,
+        exec_result: ExecutionResult,
+        version: int,
+        seen_hashes: Optional[set] = None
+    ) -> Dict[str, Any]:
+        """Build the initial LangGraph state for one pass through the agents
+
+        Each pass runs under a fresh thread_id, so the duplicate-patch
+        check in the patch generator only works if the hashes of code
+        versions already tried this session are seeded in here.
+        """
+        return {
+            "code": code,
+            "error_message": exec_result.error_message or "",
+            "error_type": exec_result.error_type.value if exec_result.error_type else "unknown",
+            "traceback": exec_result.traceback or "",
+            "execution_result": {
+                "stdout": exec_result.stdout,
+                "stderr": exec_result.stderr,
+                "exit_code": exec_result.exit_code,
+                "status": exec_result.status.value
+            },
+            "version": version,
+            "patches": [],
+            "messages": [],
+            "agent_outputs": [],
+            "current_agent": "",
+            "reasoning": "",
+            "needs_llm": True,
+            "iterations": 0,
+            "max_iterations": 1,  # Single pass through agents
+            "status": "running",
+            "traces": [],
+            "code_hashes": set(seen_hashes or ()),
+            "converged_failed": False,
+            "stream": False
+        }
+
+    async def stream_debug_events(self, code: str):
+        """Run one agent pass and yield streaming events for SSE consumers
+
+        Yields dicts of the form {"type": "token"|"trace"|"done", ...} so the
+        frontend can render LLM output as it is generated instead of waiting
+        for the full completion.
+        """
+        result = await self.sandbox.aexecute(code)
+        initial_state = self._build_agent_state(code, result, 0)
+        initial_state["stream"] = True
+        config = {"configurable": {"thread_id": f"t{next(self._thread_counter)}"}}
+
+        final_state = None
+        async for event in self.llm_debugger.graph.astream_events(
+            initial_state, config, version="v2"
+        ):
+            kind = event.get("event")
+            if kind == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if content:
+                    yield {"type": "token", "content": content}
+            elif kind == "on_chain_end" and event.get("name") == "LangGraph":
+                final_state = event["data"].get("output")
+
+        if final_state:
+            yield {
+                "type": "done",
+                "status": final_state.get("status", "unknown"),
+                "code": final_state.get("code", code),
+                "traces": final_state.get("traces", [])
+            }
+
+    def _fix_cache_key(self, code: str, exec_result: ExecutionResult) -> str:
+        """Key an LLM fix by the code and a location-normalized error"""
+        error_type = exec_result.error_type.value if exec_result.error_type else ""
+        normalized = _ERROR_LOCATION_RE.sub("", exec_result.error_message or "")
+        return hashlib.sha256(
+            f"{code}\0{error_type}\0{normalized}".encode("utf-8")
+        ).hexdigest()
+
+    def _fix_cache_put(self, key: str, patch: Patch, fixed_code: str):
+        """Record a successful fix, evicting least-recently-used entries"""
+        self._fix_cache[key] = (patch, fixed_code)
+        self._fix_cache.move_to_end(key)
+        while len(self._fix_cache) > self._FIX_CACHE_MAX:
+            self._fix_cache.popitem(last=False)
+
+    @staticmethod
+    def _reissue_patch(patch: Patch, version: int) -> Patch:
+        """Copy a shared patch with fresh identifiers for this session"""
+        return patch.model_copy(update={
+            "patch_id": uuid.uuid4().hex,
+            "version_from": version,
+            "version_to": version + 1,
+            "applied": False,
+            "timestamp": datetime.now()
+        })
+
     async def _llm_fix(
         self,
         code: str,
         exec_result: ExecutionResult,
-        version: int
+        version: int,
+        seen_hashes: Optional[set] = None
     ) -> tuple[Optional[Patch], Optional[str]]:
         """
         Use LLM agents to generate a fix
-        
+
         Args:
             code: Current code
             exec_result: Execution result with error
             version: Current version number
-            
+            seen_hashes: Hashes of code versions already tried this session
+
         Returns:
             Tuple of (Patch object or None, fixed_code or None)
         """
+        cache_key = self._fix_cache_key(code, exec_result)
+        cached = self._fix_cache.get(cache_key)
+        if cached is not None:
+            self._fix_cache.move_to_end(cache_key)
+            cached_patch, cached_code = cached
+            return self._reissue_patch(cached_patch, version), cached_code
+
+        # Coalesce concurrent identical requests: followers await the
+        # leader's in-flight future instead of issuing a duplicate LLM call
+        pending = self._inflight.get(cache_key)
+        if pending is not None:
+            try:
+                patch, fixed_code = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this caller was cancelled, not the leader
+                patch, fixed_code = None, None
+            except Exception:
+                patch, fixed_code = None, None
+            if patch is not None:
+                return self._reissue_patch(patch, version), fixed_code
+            # Leader failed or was cancelled; run our own pass
+            if self._inflight.get(cache_key) is pending:
+                del self._inflight[cache_key]
+            return await self._llm_fix(code, exec_result, version, seen_hashes)
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            patch, fixed_code = await self._run_agent_fix(
+                cache_key, code, exec_result, version, seen_hashes
+            )
+            future.set_result((patch, fixed_code))
+            return patch, fixed_code
+        except BaseException:
+            if not future.done():
+                future.cancel()
+            raise
+        finally:
+            self._inflight.pop(cache_key, None)
+
+    async def _run_agent_fix(
+        self,
+        cache_key: str,
+        code: str,
+        exec_result: ExecutionResult,
+        version: int,
+        seen_hashes: Optional[set] = None
+    ) -> tuple[Optional[Patch], Optional[str]]:
+        """Run one pass of the agent graph and extract the resulting patch"""
+        spec_task: Optional[asyncio.Task] = None
+        spec_code: Optional[str] = None
         try:
             # Prepare state for LangGraph agents
-            initial_state = {
-                "code": code,
-                "error_message": exec_result.error_message or "",
-                "error_type": exec_result.error_type.value if exec_result.error_type else "unknown",
-                "traceback": exec_result.traceback or "",
-                "execution_result": {
-                    "stdout": exec_result.stdout,
-                    "stderr": exec_result.stderr,
-                    "exit_code": exec_result.exit_code,
-                    "status": exec_result.status.value
-                },
-                "version": version,
-                "patches": [],
-                "messages": [],
-                "current_agent": "",
-                "reasoning": "",
-                "needs_llm": True,
-                "iterations": 0,
-                "max_iterations": 1,  # Single pass through agents
-                "status": "running",
-                "traces": []
-            }
-            
-            # Run the agent graph
-            config = {"configurable": {"thread_id": str(uuid.uuid4())}}
-            final_state = await self.llm_debugger.graph.ainvoke(initial_state, config)
-            
+            initial_state = self._build_agent_state(code, exec_result, version, seen_hashes)
+
+            # Stream the agent graph so a candidate fix can be executed
+            # speculatively while the downstream agents (validator, test
+            # creator, refactor, explainer) are still running
+            config = {"configurable": {"thread_id": f"t{next(self._thread_counter)}"}}
+            final_state = None
+            async for state_chunk in self.llm_debugger.graph.astream(
+                initial_state, config, stream_mode="values"
+            ):
+                final_state = state_chunk
+                if spec_task is None and state_chunk.get("patches"):
+                    candidate = state_chunk["patches"][-1].get("fixed_code")
+                    if candidate:
+                        spec_code = candidate
+                        spec_task = asyncio.create_task(self.sandbox.aexecute(candidate))
+            if final_state is None:
+                return None, None
+
             # Extract the generated patch
             if final_state.get("patches"):
                 patch_dict = final_state["patches"][-1]
                 
                 # Extract fixed code if available
                 fixed_code = patch_dict.get("fixed_code", final_state.get("code"))
-                
-                return Patch(
+
+                patch = Patch(
                     patch_id=patch_dict["patch_id"],
                     version_from=patch_dict["version_from"],
                     version_to=patch_dict["version_to"],
@@ -289,88 +651,182 @@ class HybridDebugOrchestrator:
                     error_analysis=final_state.get("reasoning", "LLM analyzed the code"),
                     fix_strategy=patch_dict.get("fix_strategy", "Applied LLM-suggested fix"),
                     error_category=final_state.get("error_type", "unknown")
-                ), fixed_code
+                )
+                if fixed_code:
+                    self._fix_cache_put(cache_key, patch, fixed_code)
+                await self._settle_speculation(spec_task, spec_code, fixed_code)
+                return patch, fixed_code
             
-            # If no patch in standard format, try to extract fixed code
+            # If no patch in standard format, try to extract fixed code.
+            # The diff is built lazily by Patch.render_diff when a client
+            # inspects the patch, so no diff pass happens on this hot path
             if final_state.get("code") and final_state["code"] != code:
-                import difflib
-                diff = ''.join(difflib.unified_diff(
-                    code.splitlines(keepends=True),
-                    final_state["code"].splitlines(keepends=True),
-                    fromfile='original',
-                    tofile='modified',
-                    lineterm=''
-                ))
-                
                 patch = Patch(
-                    patch_id=str(uuid.uuid4()),
+                    patch_id=uuid.uuid4().hex,
                     version_from=version,
                     version_to=version + 1,
                     source=PatchSource.LLM_PATCH_GENERATOR,
                     reasoning=final_state.get("reasoning", "LLM-generated fix"),
-                    diff=diff,
+                    code_before=code,
+                    code_after=final_state["code"],
                     applied=False,
                     error_analysis=final_state.get("reasoning", "Analyzed by LLM agents"),
                     fix_strategy="Applied automated code transformation",
                     error_category=final_state.get("error_type", "logic")
                 )
+                self._fix_cache_put(cache_key, patch, final_state["code"])
+                await self._settle_speculation(spec_task, spec_code, final_state["code"])
                 return patch, final_state["code"]
-            
+
         except Exception as e:
             # Log error but don't crash
             print(f"LLM fix error: {e}")
-        
+
+        await self._settle_speculation(spec_task, spec_code, None)
         return None, None
+
+    async def _settle_speculation(
+        self,
+        spec_task: Optional[asyncio.Task],
+        spec_code: Optional[str],
+        final_code: Optional[str]
+    ):
+        """Keep a speculative run's result if the final fix matches, else drop it"""
+        if spec_task is None:
+            return
+        if final_code is not None and final_code == spec_code:
+            try:
+                self._speculated[final_code] = await spec_task
+            except Exception:
+                pass
+        else:
+            spec_task.cancel()
     
     def _apply_patch(self, original_code: str, patch: Patch) -> str:
         """
         Apply a patch to code
-        
-        Since our LLM agents generate complete fixed code, we extract it directly.
-        For rule-based patches, we parse the diff.
+
+        Both the rule patcher and the LLM agents attach the complete patched
+        source as `fixed_code`, so the common path is a field read. The diff
+        parser below only handles patches from external sources that carry
+        a unified diff without the full code.
         """
-        # For LLM-generated patches, we need to extract the fixed code
-        # The patch diff contains the unified diff format
-        
-        if not patch.diff:
+        if patch.fixed_code:
+            return patch.fixed_code
+        if patch.code_after is not None:
+            return patch.code_after
+
+        diff = patch.render_diff()
+        if not diff:
             return original_code
-        
-        # Parse unified diff to get the new code
-        lines = patch.diff.split('\n')
-        new_code_lines = []
-        in_content = False
-        
-        for line in lines:
-            if line.startswith('@@'):
-                in_content = True
+
+        # Apply the unified diff hunk by hunk against the original source;
+        # unchanged regions outside hunks are copied through, so multi-hunk
+        # patches and context-only lines are handled correctly
+        original_lines = original_code.splitlines(keepends=True)
+        result = []
+        cursor = 0
+        applied = False
+        diff_lines = diff.split('\n')
+        i = 0
+        while i < len(diff_lines):
+            header = _HUNK_HEADER_RE.match(diff_lines[i])
+            if not header:
+                i += 1
                 continue
-            if in_content:
+            start = max(int(header.group(1)) - 1, 0)
+            result.extend(original_lines[cursor:start])
+            cursor = start
+            i += 1
+            while i < len(diff_lines) and not diff_lines[i].startswith('@@'):
+                line = diff_lines[i]
                 if line.startswith('+') and not line.startswith('+++'):
-                    # This is an added line
-                    new_code_lines.append(line[1:])
-                elif not line.startswith('-') and not line.startswith('\\'):
-                    # This is a context line (unchanged)
-                    new_code_lines.append(line[1:] if line.startswith(' ') else line)
-        
-        # If we successfully parsed the diff, return the new code
-        if new_code_lines:
-            result = '\n'.join(new_code_lines)
-            # Clean up any empty trailing lines
-            return result.strip() + '\n'
-        
+                    result.append(line[1:] + '\n')
+                    applied = True
+                elif line.startswith('-') and not line.startswith('---'):
+                    cursor += 1
+                    applied = True
+                elif line.startswith(' '):
+                    if cursor < len(original_lines):
+                        result.append(original_lines[cursor])
+                    cursor += 1
+                elif not line.startswith(('\\', '---', '+++')):
+                    break
+                i += 1
+        result.extend(original_lines[cursor:])
+
+        if applied:
+            return ''.join(result)
+
         # Fallback: return original if parsing failed
         return original_code
     
+    def _persist_sessions(self, evicted: list):
+        """Write evicted sessions to disk so get_session can rehydrate them"""
+        try:
+            self._SESSIONS_DIR.mkdir(exist_ok=True)
+        except OSError:
+            return
+        for session in evicted:
+            try:
+                path = self._SESSIONS_DIR / f"{session.session_id}.json"
+                path.write_text(session.model_dump_json())
+            except OSError:
+                continue  # the session is simply gone; eviction stands
+
     def get_session(self, session_id: str) -> Optional[DebugSession]:
-        """Get a debug session by ID"""
-        return self.sessions.get(session_id)
+        """Get a debug session by ID, rehydrating from disk if evicted"""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self.sessions.move_to_end(session_id)
+            return session
+        path = self._SESSIONS_DIR / f"{session_id}.json"
+        try:
+            session = DebugSession.model_validate_json(path.read_text())
+        except (OSError, ValueError):
+            return None
+        # Any session container died with its eviction; drop the handle so
+        # executions fall back to the shared pool
+        session.sandbox_handle = None
+        self.sessions[session_id] = session
+        return session
     
+    # Polling-backoff bounds: hint starts at the floor and doubles per
+    # second of unchanged status up to the ceiling
+    _POLL_FLOOR_MS = 100
+    _POLL_CEIL_MS = 5000
+
     def get_session_status(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get the current status of a debugging session"""
+        """Get the current status of a debugging session
+
+        Includes a next_poll_ms backoff hint: while the session state is
+        unchanged (typically a long LLM inference gap) the suggested
+        interval doubles from 100ms up to 5s, and resets on any change, so
+        a well-behaved client stops hammering an idle session.
+        """
         session = self.get_session(session_id)
         if not session:
             return None
-        
+
+        fingerprint = (
+            session.status,
+            session.current_version,
+            session.current_iteration,
+            len(session.patches),
+            len(session.traces)
+        )
+        now = time.monotonic()
+        seen = self._status_seen.get(session_id)
+        if seen is None or seen[0] != fingerprint:
+            self._status_seen[session_id] = (fingerprint, now)
+            next_poll_ms = self._POLL_FLOOR_MS
+        else:
+            unchanged_for = now - seen[1]
+            next_poll_ms = min(
+                self._POLL_CEIL_MS,
+                self._POLL_FLOOR_MS * (2 ** min(int(unchanged_for), 6))
+            )
+
         return {
             "session_id": session.session_id,
             "status": session.status,
@@ -378,5 +834,6 @@ class HybridDebugOrchestrator:
             "current_iteration": session.current_iteration,
             "max_iterations": session.max_iterations,
             "total_patches": len(session.patches),
-            "latest_trace": session.traces[-1] if session.traces else None
+            "latest_trace": session.traces[-1] if session.traces else None,
+            "next_poll_ms": next_poll_ms
         }
@@ -1,173 +1,389 @@
 """Rule-based error detection and patching system"""
 import re
 import ast
+import hashlib
+import io
+import tokenize
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Optional, Tuple, List
 from .models import ErrorType, Patch, PatchSource
 import uuid
 import difflib
 
 
+# All patterns are compiled once at import so the hot fix loop reuses the
+# same pattern objects instead of round-tripping through re's internal cache
+_PRINT_PY2_RX = re.compile(r'\bprint\s+([^(].*?)(?=\n|$)')
+_NO_MODULE_RX = re.compile(r"No module named '(.*?)'")
+_NAME_ERR_RX = re.compile(r"name '(.*?)' is not defined")
+_DIVISION_RX = re.compile(r'(\w+)\s*/\s*(\w+)')
+_CONCAT_RX = re.compile(r'(["\'][^"\']*["\'])\s*\+\s*(\w+)')
+_SEQ_MULT_RX = re.compile(r'(\w+)\s*\*\s*(\d+\.\d+)')
+_INDEX_RX = re.compile(r'(\w+)\[(\w+)\]')
+_INT_CALL_RX = re.compile(r'int\(([^)]+)\)')
+_FUNC_DEF_RX = re.compile(r'^(\s*)def (\w+)\(([^)]*)\):')
+_NO_ATTR_RX = re.compile(r"has no attribute '(.*?)'")
+_TUPLE_ASSIGN_RX = re.compile(r'(\w+)\s*=\s*\(([^)]*)\)')
+_KEY_ERR_RX = re.compile(r"KeyError: ['\"]([^'\"]*)['\"]|")
+_DICT_ACCESS_RX = re.compile(r'(\w+)\[(["\'][^"\']["\'])\]')
+_LEADING_WS_RX = re.compile(r'[ \t]*')
+
+
+def _indent(line: str) -> int:
+    """Width of the leading whitespace, without allocating a stripped copy"""
+    return _LEADING_WS_RX.match(line).end()
+
+# Module-name typos mapped to a precompiled import matcher and replacement.
+# Names extracted from error messages are only ever used as keys into these
+# tables — never interpolated into a pattern — so a name containing regex
+# metacharacters cannot raise re.error or match unintended text
+_IMPORT_FIXES = {
+    'np': (re.compile(r'\bimport np\b'), 'import numpy as np'),
+    'pd': (re.compile(r'\bimport pd\b'), 'import pandas as pd'),
+    'plt': (re.compile(r'\bimport plt\b'), 'import matplotlib.pyplot as plt'),
+}
+
+# Misspelled names mapped to a precompiled word matcher and correction
+_NAME_TYPOS = {
+    'ture': (re.compile(r'\bture\b'), 'True'),
+    'fasle': (re.compile(r'\bfasle\b'), 'False'),
+    'Ture': (re.compile(r'\bTure\b'), 'True'),
+    'Flase': (re.compile(r'\bFlase\b'), 'False'),
+    'none': (re.compile(r'\bnone\b'), 'None'),
+}
+
+# MULTILINE so each pattern sweeps the whole source in one C-level subn
+# instead of a Python loop doing per-line matches
+_COLON_PATTERNS = tuple(
+    (re.compile(p, re.MULTILINE), r'\1\2:') for p in (
+        r'^([ \t]*)(if .+?)(?<!:)$',
+        r'^([ \t]*)(elif .+?)(?<!:)$',
+        r'^([ \t]*)(else)(?<!:)$',
+        r'^([ \t]*)(for .+?)(?<!:)$',
+        r'^([ \t]*)(while .+?)(?<!:)$',
+        r'^([ \t]*)(def .+?\))(?<!:)$',
+        r'^([ \t]*)(class .+?)(?<!:)$',
+    )
+)
+
+# Single alternation + callback substitution: one pass over the source
+# corrects every known typo instead of one subn per entry
+_TYPO_MAP = {
+    'pirnt': 'print',
+    'improt': 'import',
+    'retrun': 'return',
+    'deifne': 'define',
+}
+_TYPO_RX = re.compile(r'\b(' + '|'.join(_TYPO_MAP) + r')\b')
+
+# Most fixable error shapes are plain substrings; str.__contains__ is a
+# tight C loop that beats SRE dispatch on these short messages, so can_fix
+# checks the literals first and only then the few genuinely regex-y shapes
+_FIXABLE_LITERALS = (
+    # Syntax errors
+    "SyntaxError",
+    "IndentationError",
+    "invalid syntax",
+    "expected ':'",
+    # Name errors
+    "ModuleNotFoundError",
+    "ImportError",
+    # Type errors
+    "TypeError: unsupported operand",
+    "TypeError: can only concatenate",
+    # Index errors
+    "IndexError: list index out of range",
+    "IndexError: string index out of range",
+    # Value errors
+    "ValueError: invalid literal",
+    "ValueError: could not convert",
+    # Runtime errors
+    "ZeroDivisionError",
+    "KeyError:",
+    # Recursion errors
+    "RecursionError: maximum recursion depth",
+)
+
+_FIXABLE_RXS = (
+    re.compile(r"NameError: name '.*' is not defined"),
+    re.compile(r"TypeError: .* takes .* positional argument"),
+    re.compile(r"AttributeError: .* has no attribute"),
+)
+
+# Statements that must end their header line with a colon
+_BLOCK_KEYWORDS = frozenset(
+    {'if', 'elif', 'else', 'for', 'while', 'def', 'class', 'try',
+     'except', 'finally', 'with'}
+)
+
+
+def _missing_colon_rows(code: str) -> Optional[List[int]]:
+    """Find physical rows of block headers lacking their trailing colon
+
+    Uses the tokenizer rather than per-line regexes, so string literals,
+    comments, and multi-line conditions cannot produce false positives.
+    Returns None when the code cannot be tokenized at all (the caller then
+    falls back to the regex heuristics).
+    """
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(code).readline))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return None
+
+    rows: List[int] = []
+    expecting = False   # inside a block-keyword logical line
+    has_colon = False
+    depth = 0
+    end_row = 0
+    at_line_start = True
+    for ttype, string, _, end, _ in tokens:
+        if ttype == tokenize.NEWLINE:
+            if expecting and not has_colon:
+                rows.append(end_row)
+            expecting = False
+            at_line_start = True
+            continue
+        if ttype == tokenize.NL:
+            # Blank/comment-only line between statements; NL inside
+            # brackets is mere line wrapping within the same logical line
+            if depth == 0:
+                at_line_start = True
+            continue
+        if ttype in (tokenize.INDENT, tokenize.DEDENT, tokenize.COMMENT,
+                     tokenize.ENDMARKER):
+            continue
+        if at_line_start and ttype == tokenize.NAME and string in _BLOCK_KEYWORDS:
+            expecting = True
+            has_colon = False
+        at_line_start = False
+        if ttype == tokenize.OP:
+            if string in '([{':
+                depth += 1
+            elif string in ')]}':
+                depth -= 1
+            elif string == ':' and depth == 0:
+                has_colon = True
+        end_row = end[0]
+    return rows
+
+
+# Every category marker is a plain exception-class substring, so the
+# classifier is a short literal scan rather than a regex; the taxonomy
+# mirrors the one used by the LLM prompts
+_CAT_LITERALS = (
+    ("SyntaxError", "syntax"),
+    ("IndentationError", "syntax"),
+    ("NameError", "name"),
+    ("ImportError", "name"),
+    ("TypeError", "type"),
+    ("IndexError", "index"),
+    ("ValueError", "value"),
+    ("RecursionError", "recursion"),
+    ("ZeroDivisionError", "runtime"),
+    ("AttributeError", "runtime"),
+    ("KeyError", "runtime"),
+)
+
+
+@lru_cache(maxsize=256)
+def _validate_syntax_cached(code: str) -> Tuple[bool, Optional[str]]:
+    try:
+        ast.parse(code)
+        return True, None
+    except SyntaxError as e:
+        return False, str(e)
+
+
+def _categorize(error_message: str) -> str:
+    for literal, category in _CAT_LITERALS:
+        if literal in error_message:
+            return category
+    return "unknown"
+
+
 class RuleBasedPatcher:
-    """Applies rule-based fixes for common Python errors"""
-    
-    def __init__(self):
-        self.rules = [
-            self._fix_syntax_errors,
-            self._fix_import_errors,
-            self._fix_name_errors,
-            self._fix_indentation,
-            self._fix_missing_colons,
-            self._fix_print_syntax,
-            self._fix_common_typos,
-            self._fix_zero_division,
-            self._fix_type_errors,
-            self._fix_index_errors,
-            self._fix_value_errors,
-            self._fix_recursion_errors,
-            self._fix_attribute_errors,
-            self._fix_key_errors,
-        ]
-    
-    def can_fix(self, error_message: str, code: str) -> bool:
-        """Check if this error can be fixed by rules"""
-        fixable_patterns = [
-            # Syntax errors
-            r"SyntaxError",
-            r"IndentationError",
-            r"invalid syntax",
-            r"expected ':'",
-            # Name errors
-            r"NameError: name '.*' is not defined",
-            r"ModuleNotFoundError",
-            r"ImportError",
-            # Type errors
-            r"TypeError: unsupported operand",
-            r"TypeError: .* takes .* positional argument",
-            r"TypeError: can only concatenate",
-            # Index errors
-            r"IndexError: list index out of range",
-            r"IndexError: string index out of range",
-            # Value errors
-            r"ValueError: invalid literal",
-            r"ValueError: could not convert",
-            # Runtime errors
-            r"ZeroDivisionError",
-            r"AttributeError: .* has no attribute",
-            r"KeyError:",
-            # Recursion errors
-            r"RecursionError: maximum recursion depth",
-        ]
-        return any(re.search(pattern, error_message) for pattern in fixable_patterns)
-    
-    def generate_patch(self, error_message: str, code: str, version: int) -> Optional[Patch]:
-        """Try to generate a patch using rule-based fixes"""
-        # Extract error category from error message
-        error_category = "unknown"
-        if "SyntaxError" in error_message or "IndentationError" in error_message:
-            error_category = "syntax"
-        elif "NameError" in error_message or "ImportError" in error_message:
-            error_category = "name"
-        elif "TypeError" in error_message:
-            error_category = "type"
-        elif "IndexError" in error_message:
-            error_category = "index"
-        elif "ValueError" in error_message:
-            error_category = "value"
-        elif "RecursionError" in error_message:
-            error_category = "recursion"
-        elif "ZeroDivisionError" in error_message or "AttributeError" in error_message or "KeyError" in error_message:
-            error_category = "runtime"
-        
-        for rule in self.rules:
-            fixed_code, reasoning = rule(error_message, code)
+    """Applies rule-based fixes for common Python errors
+
+    The patcher holds no per-instance state: the rule table lives on the
+    class, so instances are interchangeable and the hot loop avoids
+    rebuilding the rule list per object.
+    """
+
+    def can_fix(self, error_message: str, code: str = "") -> bool:
+        """Check if this error can be fixed by rules
+
+        `code` is accepted for backward compatibility but unused; the
+        decision depends only on the error message.
+        """
+        if any(literal in error_message for literal in _FIXABLE_LITERALS):
+            return True
+        return any(rx.search(error_message) for rx in _FIXABLE_RXS)
+
+    def try_patch(self, code: str, error_message: str) -> Tuple[Optional[str], str]:
+        """Run the rules and return (fixed_code, reasoning) on the first hit
+
+        Returns (None, "") when no rule applies. Unlike generate_patch this
+        hands back the fixed code directly, for callers that build their own
+        patch records (e.g. the agent graph's rule pre-pass).
+        """
+        recipe = self._apply_rules(error_message, code)
+        if recipe:
+            return recipe[0], recipe[1]
+        return None, ""
+
+    def _apply_rules(self, error_message: str, code: str) -> Optional[Tuple[str, str, str]]:
+        """Run the category's rules; (fixed_code, reasoning, category) on a hit
+
+        Only the rules that can address the detected category run; the full
+        table is the fallback for unclassified errors. The line list is
+        split once and shared across every rule tried.
+        """
+        error_category = _categorize(error_message)
+        lines = code.split('\n')
+        for rule in self.RULES_BY_CATEGORY.get(error_category, self.RULES):
+            fixed_code, reasoning = rule(self, error_message, code, lines)
             if fixed_code and fixed_code != code:
-                diff = self._generate_diff(code, fixed_code)
-                patch = Patch(
-                    patch_id=str(uuid.uuid4()),
-                    version_from=version,
-                    version_to=version + 1,
-                    source=PatchSource.RULE_BASED,
-                    reasoning=reasoning,
-                    diff=diff,
-                    applied=False,
-                    error_analysis=f"Rule-based analysis: {error_message[:200]}",
-                    fix_strategy=reasoning,
-                    error_category=error_category
-                )
+                return fixed_code, reasoning, error_category
         return None
+
+    # The rules are pure in (error_message, code), so their outcome — hit or
+    # miss — is memoized class-wide under a fixed-size digest key. Shared on
+    # the class because instances are interchangeable (see docstring).
+    _RECIPE_CACHE: "OrderedDict[bytes, Optional[Tuple[str, str, str]]]" = OrderedDict()
+    _RECIPE_CACHE_MAX = 256
+
+    @staticmethod
+    def _recipe_key(error_message: str, code: str) -> bytes:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(error_message.encode('utf-8', 'replace'))
+        h.update(b'\x00')
+        h.update(code.encode('utf-8', 'replace'))
+        return h.digest()
+
+    def _build_patch(self, recipe: Tuple[str, str, str], error_message: str,
+                     code: str, version: int) -> Patch:
+        fixed_code, reasoning, error_category = recipe
+        return Patch(
+            patch_id=uuid.uuid4().hex,
+            version_from=version,
+            version_to=version + 1,
+            source=PatchSource.RULE_BASED,
+            reasoning=reasoning,
+            code_before=code,
+            code_after=fixed_code,
+            applied=False,
+            error_analysis=f"Rule-based analysis: {error_message[:200]}",
+            fix_strategy=reasoning,
+            error_category=error_category,
+            fixed_code=fixed_code
+        )
+
+    def generate_patch(self, error_message: str, code: str, version: int) -> Optional[Patch]:
+        """Try to generate a patch using rule-based fixes
+
+        Repeat invocations on the same (error_message, code) pair — common
+        when attempts iterate — skip the rule scan entirely and rebuild the
+        Patch (fresh patch_id, caller's version) from the cached recipe.
+        """
+        key = self._recipe_key(error_message, code)
+        cache = self._RECIPE_CACHE
+        if key in cache:
+            cache.move_to_end(key)
+            recipe = cache[key]
+            return self._build_patch(recipe, error_message, code, version) if recipe else None
+
+        recipe = self._apply_rules(error_message, code)
+        cache[key] = recipe
+        while len(cache) > self._RECIPE_CACHE_MAX:
+            cache.popitem(last=False)
+        return self._build_patch(recipe, error_message, code, version) if recipe else None
     
+    # Changed spans wider than this fall back to difflib for readable hunks
+    _DIFF_SPAN_LIMIT = 50
+
     def _generate_diff(self, original: str, modified: str) -> str:
-        """Generate unified diff between two code versions"""
-        diff = difflib.unified_diff(
-            original.splitlines(keepends=True),
-            modified.splitlines(keepends=True),
-            fromfile='original',
-            tofile='modified',
-            lineterm=''
-        )
-        return ''.join(diff)
+        """Generate unified diff between two code versions
+
+        Rule fixes are local (usually one line), so the common case is
+        handled by trimming the shared prefix/suffix and emitting a single
+        minimal hunk in O(N) instead of running SequenceMatcher. Widely
+        scattered changes fall back to difflib.
+        """
+        a = original.splitlines(keepends=True)
+        b = modified.splitlines(keepends=True)
+
+        lo = 0
+        while lo < len(a) and lo < len(b) and a[lo] == b[lo]:
+            lo += 1
+        hi_a, hi_b = len(a), len(b)
+        while hi_a > lo and hi_b > lo and a[hi_a - 1] == b[hi_b - 1]:
+            hi_a -= 1
+            hi_b -= 1
+
+        if hi_a == lo and hi_b == lo:
+            return ""
+
+        if max(hi_a - lo, hi_b - lo) > self._DIFF_SPAN_LIMIT:
+            return ''.join(difflib.unified_diff(
+                a, b, fromfile='original', tofile='modified', lineterm=''
+            ))
+
+        out = [
+            "--- original\n",
+            "+++ modified\n",
+            f"@@ -{lo + 1},{hi_a - lo} +{lo + 1},{hi_b - lo} @@\n",
+        ]
+        for line in a[lo:hi_a]:
+            out.append('-' + line)
+        for line in b[lo:hi_b]:
+            out.append('+' + line)
+        return ''.join(out)
     
-    def _fix_syntax_errors(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_syntax_errors(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix common syntax errors"""
         # Fix missing parentheses in print (Python 2 to 3)
         if "SyntaxError" in error_message and "print" in code:
-            return self._fix_print_syntax(error_message, code)
+            return self._fix_print_syntax(error_message, code, lines)
         return None, ""
     
-    def _fix_print_syntax(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_print_syntax(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Convert Python 2 print statements to Python 3"""
-        pattern = r'\bprint\s+([^(].*?)(?=\n|$)'
-        if re.search(pattern, code):
-            fixed = re.sub(pattern, r'print(\1)', code)
+        # subn matches and substitutes in one pass over the source
+        fixed, n = _PRINT_PY2_RX.subn(r'print(\1)', code)
+        if n:
             return fixed, "Fixed print statement syntax: converted Python 2 style to Python 3 function call"
         return None, ""
     
-    def _fix_import_errors(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_import_errors(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix common import errors"""
         # Extract missing module name
-        match = re.search(r"No module named '(.*?)'", error_message)
+        match = _NO_MODULE_RX.search(error_message)
         if match:
             module = match.group(1)
-            # Common module name typos
-            corrections = {
-                'np': 'numpy',
-                'pd': 'pandas',
-                'plt': 'matplotlib.pyplot',
-            }
-            if module in corrections:
-                fixed = re.sub(
-                    rf'\bimport {module}\b',
-                    f'import {corrections[module]} as {module}',
-                    code
-                )
-                return fixed, f"Fixed import: changed '{module}' to '{corrections[module]} as {module}'"
+            fix = _IMPORT_FIXES.get(module)
+            if fix:
+                import_rx, replacement = fix
+                fixed = import_rx.sub(replacement, code)
+                return fixed, f"Fixed import: changed '{module}' to '{replacement[7:]}'"
         return None, ""
     
-    def _fix_name_errors(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_name_errors(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix common name errors"""
-        match = re.search(r"name '(.*?)' is not defined", error_message)
+        match = _NAME_ERR_RX.search(error_message)
         if match:
             undefined_name = match.group(1)
-            
-            # Check for common typos
-            typo_map = {
-                'ture': 'True',
-                'fasle': 'False',
-                'Ture': 'True',
-                'Flase': 'False',
-                'none': 'None',
-            }
-            
-            if undefined_name in typo_map:
-                fixed = re.sub(rf'\b{undefined_name}\b', typo_map[undefined_name], code)
-                return fixed, f"Fixed typo: changed '{undefined_name}' to '{typo_map[undefined_name]}'"
+            fix = _NAME_TYPOS.get(undefined_name)
+            if fix:
+                name_rx, correction = fix
+                fixed = name_rx.sub(correction, code)
+                return fixed, f"Fixed typo: changed '{undefined_name}' to '{correction}'"
         
         return None, ""
     
-    def _fix_indentation(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_indentation(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix indentation errors"""
         if "IndentationError" in error_message or "expected an indented block" in error_message:
-            lines = code.split('\n')
             fixed_lines = []
             needs_indent = False
             
@@ -191,79 +407,66 @@ class RuleBasedPatcher:
         
         return None, ""
     
-    def _fix_missing_colons(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_missing_colons(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix missing colons after if, for, while, def, class"""
         if "invalid syntax" in error_message or "expected ':'" in error_message:
-            # Match lines that should end with colon but don't
-            patterns = [
-                (r'^(\s*)(if .+[^:])$', r'\1\2:'),
-                (r'^(\s*)(elif .+[^:])$', r'\1\2:'),
-                (r'^(\s*)(else[^:])$', r'\1\2:'),
-                (r'^(\s*)(for .+[^:])$', r'\1\2:'),
-                (r'^(\s*)(while .+[^:])$', r'\1\2:'),
-                (r'^(\s*)(def .+\)[^:])$', r'\1\2:'),
-                (r'^(\s*)(class .+[^:])$', r'\1\2:'),
-            ]
-            
-            lines = code.split('\n')
-            fixed_lines = []
-            fixed = False
-            
-            for line in lines:
-                new_line = line
-                for pattern, replacement in patterns:
-                    if re.match(pattern, line):
-                        new_line = re.sub(pattern, replacement, line, flags=re.MULTILINE)
-                        if new_line != line:
-                            fixed = True
-                        break
-                fixed_lines.append(new_line)
-            
-            if fixed:
+            # Token-based pass first: precise about strings/comments and
+            # multi-line headers, which line regexes cannot be
+            rows = _missing_colon_rows(code)
+            if rows:
+                fixed_lines = list(lines)
+                for row in rows:
+                    fixed_lines[row - 1] = fixed_lines[row - 1].rstrip() + ':'
                 return '\n'.join(fixed_lines), "Fixed missing colons: added colons after control flow statements"
-        
+            if rows is not None:
+                # Tokenized cleanly with no missing colons; regexes would
+                # only produce false positives here
+                return None, ""
+
+            # Untokenizable code: fall back to the regex heuristics, each
+            # sweeping the whole source once under re.MULTILINE
+            fixed = code
+            total = 0
+            for colon_rx, replacement in _COLON_PATTERNS:
+                fixed, n = colon_rx.subn(replacement, fixed)
+                total += n
+
+            if total and fixed != code:
+                return fixed, "Fixed missing colons: added colons after control flow statements"
+
         return None, ""
     
-    def _fix_common_typos(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_common_typos(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix common typos in code"""
-        typos = {
-            r'\bpirnt\b': 'print',
-            r'\bimprot\b': 'import',
-            r'\bretrun\b': 'return',
-            r'\bdeifne\b': 'define',
-        }
-        
-        fixed = code
-        changes = []
-        for typo, correction in typos.items():
-            if re.search(typo, fixed):
-                fixed = re.sub(typo, correction, fixed)
-                changes.append(f"'{typo}' → '{correction}'")
-        
-        if changes:
-            return fixed, f"Fixed typos: {', '.join(changes)}"
-        
+        changes: dict = {}
+
+        def _swap(m):
+            typo = m.group(1)
+            changes[typo] = _TYPO_MAP[typo]
+            return _TYPO_MAP[typo]
+
+        fixed, n = _TYPO_RX.subn(_swap, code)
+        if n:
+            summary = ', '.join(f"'{t}' → '{c}'" for t, c in changes.items())
+            return fixed, f"Fixed typos: {summary}"
+
         return None, ""
     
-    def _fix_zero_division(self, code: str, error_msg: str) -> Tuple[Optional[str], str]:
+    def _fix_zero_division(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix ZeroDivisionError by adding a check before division"""
-        if "ZeroDivisionError" not in error_msg:
+        if "ZeroDivisionError" not in error_message:
             return None, ""
-        
-        lines = code.split('\n')
+
         fixed_lines = []
         
-        # Pattern to detect division operations
-        division_pattern = r'(\w+)\s*/\s*(\w+)'
-        
         for line in lines:
             # Check if this line contains a division
             if '/' in line and '//' not in line:  # Exclude floor division
-                match = re.search(division_pattern, line)
+                match = _DIVISION_RX.search(line)
                 if match:
                     # Extract the divisor variable
                     divisor = match.group(2)
-                    indent = len(line) - len(line.lstrip())
+                    indent = _indent(line)
                     
                     # Add check before the operation
                     fixed_lines.append(' ' * indent + f'if {divisor} == 0:')
@@ -280,7 +483,7 @@ class RuleBasedPatcher:
         
         return None, ""
     
-    def _fix_type_errors(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_type_errors(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix common type errors"""
         if "TypeError" not in error_message:
             return None, ""
@@ -288,43 +491,37 @@ class RuleBasedPatcher:
         # Fix string + int concatenation
         if "can only concatenate str" in error_message:
             # Find patterns like: "text" + number
-            pattern = r'(["\'][^"\']*["\'])\s*\+\s*(\w+)'
-            if re.search(pattern, code):
-                fixed = re.sub(pattern, r'\1 + str(\2)', code)
+            fixed, n = _CONCAT_RX.subn(r'\1 + str(\2)', code)
+            if n:
                 return fixed, "Fixed type error: wrapped integer in str() for string concatenation"
-        
+
         # Fix list/string operations
         if "unsupported operand" in error_message:
             # Common: multiplying list by float
-            pattern = r'(\w+)\s*\*\s*(\d+\.\d+)'
-            if re.search(pattern, code):
-                fixed = re.sub(pattern, r'\1 * int(\2)', code)
+            fixed, n = _SEQ_MULT_RX.subn(r'\1 * int(\2)', code)
+            if n:
                 return fixed, "Fixed type error: converted float to int for sequence multiplication"
         
         return None, ""
     
-    def _fix_index_errors(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_index_errors(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix common index out of range errors"""
         if "IndexError" not in error_message:
             return None, ""
-        
-        lines = code.split('\n')
+
         fixed_lines = []
         
-        # Pattern to detect array indexing
-        index_pattern = r'(\w+)\[(\w+)\]'
-        
         for line in lines:
             if '[' in line and ']' in line:
-                match = re.search(index_pattern, line)
+                match = _INDEX_RX.search(line)
                 if match:
                     array_name = match.group(1)
                     index_var = match.group(2)
-                    indent = len(line) - len(line.lstrip())
-                    
+                    indent = _indent(line)
+
                     # Add bounds check
                     fixed_lines.append(' ' * indent + f'if {index_var} < len({array_name}):')
-                    fixed_lines.append(' ' * (indent + 4) + line.lstrip())
+                    fixed_lines.append(' ' * (indent + 4) + line[indent:])
                     fixed_lines.append(' ' * indent + 'else:')
                     fixed_lines.append(' ' * (indent + 4) + f'print("Index out of range: {{0}}".format({index_var}))')
                 else:
@@ -338,7 +535,7 @@ class RuleBasedPatcher:
         
         return None, ""
     
-    def _fix_value_errors(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_value_errors(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix common value errors"""
         if "ValueError" not in error_message:
             return None, ""
@@ -346,16 +543,14 @@ class RuleBasedPatcher:
         # Fix invalid literal for int()
         if "invalid literal for int()" in error_message:
             # Wrap int() calls in try-except
-            pattern = r'int\(([^)]+)\)'
-            if re.search(pattern, code):
-                lines = code.split('\n')
+            if _INT_CALL_RX.search(code):
                 fixed_lines = []
                 
                 for line in lines:
                     if 'int(' in line and 'try:' not in line:
-                        indent = len(line) - len(line.lstrip())
+                        indent = _indent(line)
                         fixed_lines.append(' ' * indent + 'try:')
-                        fixed_lines.append(' ' * (indent + 4) + line.lstrip())
+                        fixed_lines.append(' ' * (indent + 4) + line[indent:])
                         fixed_lines.append(' ' * indent + 'except ValueError:')
                         fixed_lines.append(' ' * (indent + 4) + 'print("Invalid input: cannot convert to integer")')
                     else:
@@ -365,19 +560,15 @@ class RuleBasedPatcher:
         
         return None, ""
     
-    def _fix_recursion_errors(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_recursion_errors(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix recursion errors by adding base cases"""
         if "RecursionError" not in error_message:
             return None, ""
-        
-        lines = code.split('\n')
+
         fixed_lines = []
         
-        # Find recursive function definitions
-        func_pattern = r'^(\s*)def (\w+)\(([^)]*)\):'
-        
         for i, line in enumerate(lines):
-            match = re.match(func_pattern, line)
+            match = _FUNC_DEF_RX.match(line)
             if match:
                 indent = match.group(1)
                 func_name = match.group(2)
@@ -405,13 +596,13 @@ class RuleBasedPatcher:
         
         return None, ""
     
-    def _fix_attribute_errors(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_attribute_errors(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix common attribute errors"""
         if "AttributeError" not in error_message:
             return None, ""
         
         # Extract the attribute that doesn't exist
-        match = re.search(r"has no attribute '(.*?)'", error_message)
+        match = _NO_ATTR_RX.search(error_message)
         if match:
             missing_attr = match.group(1)
             
@@ -425,31 +616,26 @@ class RuleBasedPatcher:
             # Check if trying to append to tuple (common mistake)
             if missing_attr == 'append' and "'tuple' object" in error_message:
                 # Find tuple definitions and convert to list
-                pattern = r'(\w+)\s*=\s*\(([^)]*)\)'
-                if re.search(pattern, code):
-                    fixed = re.sub(pattern, r'\1 = [\2]', code)
+                fixed, n = _TUPLE_ASSIGN_RX.subn(r'\1 = [\2]', code)
+                if n:
                     return fixed, "Fixed attribute error: converted tuple to list to support append()"
         
         return None, ""
     
-    def _fix_key_errors(self, error_message: str, code: str) -> Tuple[Optional[str], str]:
+    def _fix_key_errors(self, error_message: str, code: str, lines: List[str]) -> Tuple[Optional[str], str]:
         """Fix common key errors in dictionaries"""
         if "KeyError" not in error_message:
             return None, ""
         
         # Extract the missing key
-        match = re.search(r"KeyError: ['\"]([^'\"]*)['\"]|", error_message)
+        match = _KEY_ERR_RX.search(error_message)
         if match:
-            lines = code.split('\n')
             fixed_lines = []
-            
-            # Find dictionary access and add .get() or check
-            dict_access_pattern = r'(\w+)\[(["\'][^"\']["\'])\]'
-            
+
             for line in lines:
                 if '[' in line and ']' in line and 'get(' not in line:
                     # Replace dict[key] with dict.get(key, default)
-                    fixed_line = re.sub(dict_access_pattern, r'\1.get(\2, None)', line)
+                    fixed_line = _DICT_ACCESS_RX.sub(r'\1.get(\2, None)', line)
                     if fixed_line != line:
                         fixed_lines.append(fixed_line)
                     else:
@@ -464,9 +650,46 @@ class RuleBasedPatcher:
         return None, ""
     
     def validate_syntax(self, code: str) -> Tuple[bool, Optional[str]]:
-        """Validate Python syntax"""
-        try:
-            ast.parse(code)
-            return True, None
-        except SyntaxError as e:
-            return False, str(e)
+        """Validate Python syntax
+
+        Memoized: the debug loop revisits overlapping code variants, and a
+        cache hit costs a string hash where ast.parse pays a full tokenize
+        and parse.
+        """
+        return _validate_syntax_cached(code)
+
+    # Rule functions in priority order, shared across all instances
+    RULES = (
+        _fix_syntax_errors,
+        _fix_import_errors,
+        _fix_name_errors,
+        _fix_indentation,
+        _fix_missing_colons,
+        _fix_print_syntax,
+        _fix_common_typos,
+        _fix_zero_division,
+        _fix_type_errors,
+        _fix_index_errors,
+        _fix_value_errors,
+        _fix_recursion_errors,
+        _fix_attribute_errors,
+        _fix_key_errors,
+    )
+
+    # Only the rules relevant to each error category, in priority order;
+    # generate_patch falls back to RULES for unclassified errors
+    RULES_BY_CATEGORY = {
+        "syntax": (
+            _fix_syntax_errors,
+            _fix_missing_colons,
+            _fix_print_syntax,
+            _fix_indentation,
+            _fix_common_typos,
+        ),
+        "name": (_fix_name_errors, _fix_import_errors, _fix_common_typos),
+        "type": (_fix_type_errors,),
+        "index": (_fix_index_errors,),
+        "value": (_fix_value_errors,),
+        "recursion": (_fix_recursion_errors,),
+        "runtime": (_fix_zero_division, _fix_attribute_errors, _fix_key_errors),
+    }
@@ -1,94 +1,514 @@
 """Docker sandbox executor for running code safely"""
+import ast
+import asyncio
+import atexit
 import json
+import os
+import queue
+import select
+import signal
 import subprocess
-from typing import Dict, Any
+import threading
+import uuid
+from functools import lru_cache
+from typing import Dict, Any, Optional
 from .models import ExecutionResult, ExecutionStatus, ErrorType
 import re
 
+# orjson is C-implemented and several times faster than stdlib json on the
+# small payloads exchanged with the sandbox; fall back transparently when
+# it is not installed
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+# One combined scan maps the error line to its ErrorType via the matched
+# group name instead of looping per-type patterns
+_ERROR_TYPE_RX = re.compile(
+    r"(?P<syntax>SyntaxError|IndentationError|TabError)"
+    r"|(?P<import_>ModuleNotFoundError|ImportError)"
+    r"|(?P<name>NameError)"
+    r"|(?P<type>TypeError)"
+    r"|(?P<attribute>AttributeError)"
+    r"|(?P<index>IndexError)"
+    r"|(?P<key>KeyError)"
+    r"|(?P<value>ValueError)"
+)
+
+_ERROR_TYPE_BY_GROUP = {
+    "syntax": ErrorType.SYNTAX,
+    "import_": ErrorType.IMPORT,
+    "name": ErrorType.NAME,
+    "type": ErrorType.TYPE,
+    "attribute": ErrorType.ATTRIBUTE,
+    "index": ErrorType.INDEX,
+    "key": ErrorType.KEY,
+    "value": ErrorType.VALUE,
+}
+
+
+def _syntax_error_result(code: str) -> Optional[ExecutionResult]:
+    """Synthesize the result for syntactically broken code without Docker
+
+    Early repair iterations are dominated by candidates that cannot even
+    parse; ast.parse costs microseconds where a container round-trip costs
+    tens to hundreds of milliseconds, so the SyntaxError is produced
+    locally in the same shape the sandbox would report it. The parse
+    outcome is memoized per code string; each caller still gets its own
+    result object so downstream mutation cannot leak across sessions.
+    """
+    cached = _parse_check_cached(code)
+    return cached.model_copy() if cached is not None else None
+
+
+@lru_cache(maxsize=256)
+def _parse_check_cached(code: str) -> Optional[ExecutionResult]:
+    try:
+        ast.parse(code)
+    except SyntaxError as e:
+        error_line = f"{type(e).__name__}: {e.msg}"
+        traceback = f'  File "<code>", line {e.lineno}\n{error_line}'
+        return ExecutionResult(
+            stdout="",
+            stderr=traceback,
+            exit_code=1,
+            status=ExecutionStatus.ERROR,
+            error_type=ErrorType.SYNTAX,
+            error_message=error_line,
+            traceback=traceback
+        )
+    except ValueError:
+        # e.g. null bytes — let the sandbox produce the real error
+        pass
+    return None
+
 
 class SandboxExecutor:
-    """Executes Python code in a Docker sandbox"""
-    
-    def __init__(self, container_name: str = "sandbox-container"):
+    """Executes Python code in a Docker sandbox
+
+    Container cold-start (~0.5-2s) dominates the cost of running a code
+    snippet, so a pool of long-lived containers is kept warm and executions
+    are dispatched into them with `docker exec`. If the pool cannot be
+    started (no Docker, image missing), each call falls back to the
+    original cold `docker run` path.
+    """
+
+    def __init__(
+        self,
+        container_name: str = "sandbox-container",
+        pool_size: int = 4,
+        max_uses_per_container: int = 50
+    ):
         self.container_name = container_name
-    
+        self.pool_size = pool_size
+        # Recycle a warm container after this many executions so leaked
+        # files/processes from sandboxed code cannot accumulate forever
+        self.max_uses_per_container = max_uses_per_container
+        self._pool: queue.Queue = queue.Queue()
+        self._use_counts: Dict[str, int] = {}
+        self._pool_started = False
+        # Persistent in-container worker for the sync path: one docker exec
+        # kept open for the process lifetime, fed newline-delimited JSON
+        self._worker_proc: Optional[subprocess.Popen] = None
+        self._worker_name: Optional[str] = None
+        self._worker_lock = threading.Lock()
+        self._cleanup_registered = False
+
+    def _ensure_pool(self):
+        """Start the warm container pool on first use"""
+        if self._pool_started:
+            return
+        self._pool_started = True
+        for i in range(self.pool_size):
+            name = f"{self.container_name}-warm-{i}"
+            try:
+                # Replace any stale container from a previous run
+                subprocess.run(
+                    ["docker", "rm", "-f", name],
+                    capture_output=True, timeout=10
+                )
+                result = subprocess.run(
+                    ["docker", "run", "-d", "--name", name,
+                     self.container_name, "tail", "-f", "/dev/null"],
+                    capture_output=True, text=True, timeout=15
+                )
+                if result.returncode == 0:
+                    self._pool.put(name)
+            except (subprocess.TimeoutExpired, FileNotFoundError):
+                break
+        if not self._pool.empty():
+            self._register_cleanup()
+
+    def _register_cleanup(self):
+        if not self._cleanup_registered:
+            self._cleanup_registered = True
+            atexit.register(self.shutdown_pool)
+
+    def _ensure_worker(self) -> bool:
+        """Start (or restart) the persistent worker pipe; True when usable"""
+        if self._worker_proc is not None and self._worker_proc.poll() is None:
+            return True
+        name = f"{self.container_name}-worker"
+        try:
+            subprocess.run(
+                ["docker", "rm", "-f", name],
+                capture_output=True, timeout=10
+            )
+            result = subprocess.run(
+                ["docker", "run", "-d", "--name", name,
+                 self.container_name, "tail", "-f", "/dev/null"],
+                capture_output=True, text=True, timeout=15
+            )
+            if result.returncode != 0:
+                return False
+            self._worker_proc = subprocess.Popen(
+                ["docker", "exec", "-i", name,
+                 "python", "-u", "/usr/local/bin/executor.py", "--serve"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True
+            )
+            self._worker_name = name
+            self._register_cleanup()
+            return True
+        except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+            return False
+
+    def _kill_worker(self):
+        """Tear down the worker pipe and its container"""
+        proc, self._worker_proc = self._worker_proc, None
+        name, self._worker_name = self._worker_name, None
+        if proc is not None:
+            try:
+                proc.kill()
+                proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        if name is not None:
+            try:
+                subprocess.run(
+                    ["docker", "rm", "-f", name],
+                    capture_output=True, timeout=10
+                )
+            except (subprocess.TimeoutExpired, FileNotFoundError):
+                pass
+
+    def _worker_execute(self, payload: str, timeout: int) -> Optional[str]:
+        """Round-trip one request over the persistent pipe
+
+        Returns the worker's JSON response line, or None when the worker is
+        unavailable (caller falls back to warm-pool/cold execution). A
+        response that does not arrive within `timeout` kills and recycles
+        the worker — the request may still be running inside it — and
+        raises TimeoutExpired for the caller's existing handler.
+        """
+        with self._worker_lock:
+            if not self._ensure_worker():
+                return None
+            proc = self._worker_proc
+            try:
+                proc.stdin.write(payload + "\n")
+                proc.stdin.flush()
+                ready, _, _ = select.select([proc.stdout], [], [], timeout)
+                if not ready:
+                    self._kill_worker()
+                    raise subprocess.TimeoutExpired("sandbox-worker", timeout)
+                line = proc.stdout.readline()
+            except (OSError, ValueError):
+                self._kill_worker()
+                return None
+            if not line:
+                self._kill_worker()
+                return None
+            return line
+
+    def _checkin(self, name: str):
+        """Return a container to the pool, recycling it when worn out"""
+        self._use_counts[name] = self._use_counts.get(name, 0) + 1
+        if self._use_counts[name] < self.max_uses_per_container:
+            self._pool.put(name)
+            return
+        # Replace the container with a fresh one under the same name
+        self._use_counts[name] = 0
+        try:
+            subprocess.run(
+                ["docker", "rm", "-f", name],
+                capture_output=True, timeout=10
+            )
+            result = subprocess.run(
+                ["docker", "run", "-d", "--name", name,
+                 self.container_name, "tail", "-f", "/dev/null"],
+                capture_output=True, text=True, timeout=15
+            )
+            if result.returncode == 0:
+                self._pool.put(name)
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            # Pool shrinks on respawn failure; cold fallback still works
+            pass
+
+    def shutdown_pool(self):
+        """Stop and remove the worker and all warm containers"""
+        self._kill_worker()
+        while not self._pool.empty():
+            name = self._pool.get_nowait()
+            subprocess.run(
+                ["docker", "rm", "-f", name],
+                capture_output=True, timeout=10
+            )
+
+    def create_container(self) -> Optional[str]:
+        """Start a dedicated long-lived container and return its handle
+
+        A debug session runs every code version in the same language, so
+        execing each version into one session-scoped container avoids the
+        create/destroy cycle per iteration. Returns None when Docker is
+        unavailable; callers then fall back to the pooled/cold paths.
+        """
+        name = f"{self.container_name}-sess-{uuid.uuid4().hex[:8]}"
+        try:
+            result = subprocess.run(
+                ["docker", "run", "-d", "--name", name,
+                 self.container_name, "tail", "-f", "/dev/null"],
+                capture_output=True, text=True, timeout=15
+            )
+            if result.returncode == 0:
+                return name
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            pass
+        return None
+
+    async def arun_in(self, handle: str, code: str, timeout: int = 10) -> ExecutionResult:
+        """Execute code inside an existing session container"""
+        pre = _syntax_error_result(code)
+        if pre is not None:
+            return pre
+        try:
+            payload = _json_dumps({"code": code})
+            returncode, stdout, stderr = await self._arun(
+                ["docker", "exec", "-i", handle,
+                 "python", "/usr/local/bin/executor.py"],
+                payload, timeout
+            )
+            if returncode not in (0, 1):
+                # Session container died mid-session; use the shared pool
+                return await self.aexecute(code, timeout)
+            return self._process_output(stdout, stderr, returncode)
+        except asyncio.TimeoutError:
+            return self._timeout_result()
+        except Exception:
+            return await self.aexecute(code, timeout)
+
+    def remove_container(self, handle: str):
+        """Tear down a session container"""
+        try:
+            subprocess.run(
+                ["docker", "rm", "-f", handle],
+                capture_output=True, timeout=10
+            )
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            pass
+
     def execute(self, code: str, timeout: int = 10) -> ExecutionResult:
         """
         Execute code in the Docker sandbox
-        
+
         Args:
             code: Python code to execute
             timeout: Execution timeout in seconds
-            
+
         Returns:
             ExecutionResult with stdout, stderr, exit_code, and error analysis
         """
+        pre = _syntax_error_result(code)
+        if pre is not None:
+            return pre
         try:
             # Prepare the code as JSON
-            payload = json.dumps({"code": code})
-            
-            # Execute in Docker with proper stdin handling
-            docker_cmd = ["docker", "run", "--rm", "-i", self.container_name]
-            
-            result = subprocess.run(
-                docker_cmd,
-                input=payload,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-            
-            # Parse the response
+            payload = _json_dumps({"code": code})
+
+            # Fast path: feed the long-lived worker over its stdin pipe —
+            # no docker run and no docker exec per call
+            line = self._worker_execute(payload, timeout)
+            if line is not None:
+                return self._process_output(line, "", 0)
+
+            self._ensure_pool()
+            result = None
+            warm_container = None
             try:
-                response = json.loads(result.stdout)
-                stdout = response.get("stdout", "")
-                stderr = response.get("stderr", "")
-                exit_code = response.get("exit_code", result.returncode)
-            except json.JSONDecodeError:
-                # Fallback if response is not JSON
-                stdout = result.stdout
-                stderr = result.stderr
-                exit_code = result.returncode
-            
-            # Analyze the execution
-            if exit_code == 0 and not stderr:
-                return ExecutionResult(
-                    stdout=stdout,
-                    stderr=stderr,
-                    exit_code=exit_code,
-                    status=ExecutionStatus.SUCCESS
-                )
-            else:
-                error_type, error_message, traceback = self._analyze_error(stderr)
-                return ExecutionResult(
-                    stdout=stdout,
-                    stderr=stderr,
-                    exit_code=exit_code,
-                    status=ExecutionStatus.ERROR,
-                    error_type=error_type,
-                    error_message=error_message,
-                    traceback=traceback
+                warm_container = self._pool.get_nowait()
+            except queue.Empty:
+                pass
+
+            if warm_container is not None:
+                # Dispatch into a pre-warmed container: amortizes the
+                # container start cost to zero for steady-state traffic
+                try:
+                    result = subprocess.run(
+                        ["docker", "exec", "-i", warm_container,
+                         "python", "/usr/local/bin/executor.py"],
+                        input=payload,
+                        capture_output=True,
+                        text=True,
+                        timeout=timeout
+                    )
+                finally:
+                    self._checkin(warm_container)
+
+            if result is None or result.returncode not in (0, 1):
+                # Cold fallback: one-shot container per execution
+                docker_cmd = ["docker", "run", "--rm", "-i", self.container_name]
+                result = subprocess.run(
+                    docker_cmd,
+                    input=payload,
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout
                 )
-                
+
+            return self._process_output(result.stdout, result.stderr, result.returncode)
+
         except subprocess.TimeoutExpired:
+            return self._timeout_result()
+        except Exception as e:
+            return self._failure_result(e)
+
+    async def aexecute(self, code: str, timeout: int = 10) -> ExecutionResult:
+        """
+        Async variant of execute using asyncio subprocesses
+
+        Awaiting the Docker run instead of blocking lets concurrent debug
+        sessions overlap sandbox I/O with LLM inference on one event loop.
+        """
+        pre = _syntax_error_result(code)
+        if pre is not None:
+            return pre
+        try:
+            payload = _json_dumps({"code": code})
+
+            # Pool startup and recycling shell out synchronously; run them
+            # off-loop so concurrent aexecute calls are not serialized
+            # behind docker CLI round-trips
+            await asyncio.to_thread(self._ensure_pool)
+            returncode = None
+            stdout = stderr = ""
+            warm_container = None
+            try:
+                warm_container = self._pool.get_nowait()
+            except queue.Empty:
+                pass
+
+            if warm_container is not None:
+                try:
+                    returncode, stdout, stderr = await self._arun(
+                        ["docker", "exec", "-i", warm_container,
+                         "python", "/usr/local/bin/executor.py"],
+                        payload, timeout
+                    )
+                finally:
+                    await asyncio.to_thread(self._checkin, warm_container)
+
+            if returncode is None or returncode not in (0, 1):
+                returncode, stdout, stderr = await self._arun(
+                    ["docker", "run", "--rm", "-i", self.container_name],
+                    payload, timeout
+                )
+
+            return self._process_output(stdout, stderr, returncode)
+
+        except asyncio.TimeoutError:
+            return self._timeout_result()
+        except Exception as e:
+            return self._failure_result(e)
+
+    async def _arun(self, cmd: list, payload: str, timeout: int) -> tuple[int, str, str]:
+        """Run one subprocess asynchronously, feeding payload on stdin
+
+        The child is started in its own session so a timeout can SIGKILL
+        the whole process group; killing only the direct child would leave
+        any grandchildren it spawned running and leak PIDs.
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(payload.encode("utf-8")), timeout
+            )
+        except asyncio.TimeoutError:
+            try:
+                os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                proc.kill()
+            await proc.wait()
+            raise
+        return proc.returncode, stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace")
+
+    def _process_output(self, raw_stdout: str, raw_stderr: str, returncode: int) -> ExecutionResult:
+        """Parse the executor's JSON response and build an ExecutionResult"""
+        try:
+            response = _json_loads(raw_stdout)
+            stdout = response.get("stdout", "")
+            stderr = response.get("stderr", "")
+            exit_code = response.get("exit_code", returncode)
+        except json.JSONDecodeError:
+            # Fallback if response is not JSON
+            stdout = raw_stdout
+            stderr = raw_stderr
+            exit_code = returncode
+
+        # Analyze the execution
+        if exit_code == 0 and not stderr:
             return ExecutionResult(
-                stdout="",
-                stderr="Execution timed out",
-                exit_code=-1,
-                status=ExecutionStatus.TIMEOUT,
-                error_type=ErrorType.RUNTIME,
-                error_message="Code execution exceeded time limit"
+                stdout=stdout,
+                stderr=stderr,
+                exit_code=exit_code,
+                status=ExecutionStatus.SUCCESS
             )
-        except Exception as e:
+        else:
+            error_type, error_message, traceback = self._analyze_error(stderr)
             return ExecutionResult(
-                stdout="",
-                stderr=str(e),
-                exit_code=-1,
+                stdout=stdout,
+                stderr=stderr,
+                exit_code=exit_code,
                 status=ExecutionStatus.ERROR,
-                error_type=ErrorType.RUNTIME,
-                error_message=f"Failed to execute code: {str(e)}"
+                error_type=error_type,
+                error_message=error_message,
+                traceback=traceback
             )
-    
+
+    def _timeout_result(self) -> ExecutionResult:
+        return ExecutionResult(
+            stdout="",
+            stderr="Execution timed out",
+            exit_code=-1,
+            status=ExecutionStatus.TIMEOUT,
+            error_type=ErrorType.RUNTIME,
+            error_message="Code execution exceeded time limit"
+        )
+
+    def _failure_result(self, exc: Exception) -> ExecutionResult:
+        return ExecutionResult(
+            stdout="",
+            stderr=str(exc),
+            exit_code=-1,
+            status=ExecutionStatus.ERROR,
+            error_type=ErrorType.RUNTIME,
+            error_message=f"Failed to execute code: {str(exc)}"
+        )
+
     def _analyze_error(self, stderr: str) -> tuple[ErrorType, str, str]:
         """
         Analyze error message and categorize the error type
@@ -100,29 +520,16 @@ class SandboxExecutor:
             return ErrorType.UNKNOWN, "", ""
         
         # Extract the main error message and traceback
-        lines = stderr.strip().split('\n')
         traceback = stderr
+
+        # The last line usually contains the error type; rsplit with a
+        # limit avoids materializing every traceback line just to take one
+        tail = stderr.strip()
+        error_line = tail.rsplit('\n', 1)[-1] if '\n' in tail else tail
         
-        # Find the last line which usually contains the error type
-        error_line = lines[-1] if lines else ""
-        
-        # Categorize error
-        error_patterns = {
-            ErrorType.SYNTAX: [r"SyntaxError", r"IndentationError", r"TabError"],
-            ErrorType.IMPORT: [r"ModuleNotFoundError", r"ImportError"],
-            ErrorType.NAME: [r"NameError"],
-            ErrorType.TYPE: [r"TypeError"],
-            ErrorType.ATTRIBUTE: [r"AttributeError"],
-            ErrorType.INDEX: [r"IndexError"],
-            ErrorType.KEY: [r"KeyError"],
-            ErrorType.VALUE: [r"ValueError"],
-        }
-        
-        error_type = ErrorType.RUNTIME
-        for err_type, patterns in error_patterns.items():
-            if any(re.search(pattern, error_line) for pattern in patterns):
-                error_type = err_type
-                break
+        # Categorize error with a single combined scan
+        match = _ERROR_TYPE_RX.search(error_line)
+        error_type = _ERROR_TYPE_BY_GROUP[match.lastgroup] if match else ErrorType.RUNTIME
         
         # Extract clean error message
         error_message = error_line
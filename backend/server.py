@@ -2,10 +2,36 @@
 FastAPI backend server for the debugging sandbox
 Provides REST API endpoints for the frontend
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from itertools import islice
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+
+# orjson's Rust serializer cuts response-encoding CPU severalfold on the
+# large session payloads; keep the stdlib response class when it is absent
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultJSONResponse
+
+    def _json_bytes(payload) -> bytes:
+        return orjson.dumps(payload)
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultJSONResponse
+
+    def _json_bytes(payload) -> bytes:
+        return json.dumps(payload).encode()
+# msgpack drops the repeated string keys JSON carries, shrinking session
+# payloads ~30% for clients that ask for it; optional like orjson
+try:
+    from msgspec.msgpack import encode as _msgpack_encode
+except ImportError:
+    _msgpack_encode = None
 from typing import Dict, List, Optional
 import asyncio
+import difflib
+import json
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
@@ -16,29 +42,223 @@ load_dotenv()
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.models import (
-    CodeSubmission, SessionResponse, DebugSession,
+    CodeSubmission, DebugSession,
     CodeVersion, Patch
 )
 from backend.orchestrator import HybridDebugOrchestrator
+from sandbox.executor import CodeExecutor
+
+# Debug loops run from a bounded queue drained by a fixed set of workers,
+# so a submission burst queues up instead of oversubscribing the LLM
+# backend with unbounded concurrent loops
+_DEBUG_QUEUE_MAX = 100
+_DEBUG_WORKERS = 2
+
+
+async def _debug_worker(queue: asyncio.Queue):
+    while True:
+        session_id = await queue.get()
+        try:
+            await orchestrator.run_debug_loop_for_session(session_id)
+        except Exception as e:
+            print(f"Debug loop failed for session {session_id}: {e}")
+        finally:
+            queue.task_done()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.debug_queue = asyncio.Queue(maxsize=_DEBUG_QUEUE_MAX)
+    workers = [
+        asyncio.create_task(_debug_worker(app.state.debug_queue))
+        for _ in range(_DEBUG_WORKERS)
+    ]
+    yield
+    for worker in workers:
+        worker.cancel()
+
 
 app = FastAPI(
     title="AI Debugging Sandbox API",
     description="Local AI-Supervised Autonomous Debugging System",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultJSONResponse,
+    lifespan=lifespan
 )
 
-# Enable CORS for frontend
+# Enable CORS for frontend. The API surface is GET/POST only; listing the
+# methods and headers explicitly (instead of "*") plus a max_age lets
+# browsers cache the preflight for a day instead of re-sending OPTIONS
+# around every poll
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:3000"],  # Vite default port
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
 # Global orchestrator instance
 orchestrator = HybridDebugOrchestrator(llm_model="codellama:7b")
 
+# One executor for every /api/execute call: construction re-checks Docker
+# availability and image configuration, which is pure overhead per request.
+# The semaphore caps how many containers run at once.
+executor = CodeExecutor(timeout=10, use_docker=True)
+executor.docker_image = "multi-lang-executor:latest"  # Use our multi-language image
+_execute_semaphore = asyncio.Semaphore(4)
+
+
+# Encoded session bodies keyed by session_id: the frontend polls
+# /api/session/{id} far more often than sessions change, so unchanged
+# sessions are served as cached bytes without rebuilding or re-encoding
+_SESSION_CACHE_MAX = 256
+_session_body_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+# Unified diffs keyed by (session_id, from, to); version code is immutable
+# so entries never need invalidating, only LRU bounding
+_DIFF_CACHE_MAX = 512
+_diff_cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+# Encoded bytes for closed versions and patches, keyed by session_id.
+# Once a newer version exists, earlier versions (and their patches) never
+# change again, so their rendered JSON is spliced into each response
+# verbatim instead of being re-encoded every poll
+_FROZEN_CACHE_MAX = 256
+_frozen_chunks: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def _frozen_lists(session_id: str) -> tuple:
+    lists = _frozen_chunks.get(session_id)
+    if lists is None:
+        lists = ([], [])
+        _frozen_chunks[session_id] = lists
+        while len(_frozen_chunks) > _FROZEN_CACHE_MAX:
+            _frozen_chunks.popitem(last=False)
+    else:
+        _frozen_chunks.move_to_end(session_id)
+    return lists
+
+
+def _session_state_key(session: DebugSession) -> tuple:
+    """Fingerprint of everything the session payload can change on"""
+    return (
+        session.current_version,
+        session.current_iteration,
+        session.status,
+        len(session.versions),
+        len(session.patches),
+        len(session.traces)
+    )
+
+
+def _serialize_execution(result) -> Optional[dict]:
+    """Build the execution-result payload shared by the version endpoints"""
+    if not result:
+        return None
+    return {
+        "stdout": result.stdout,
+        "stderr": result.stderr,
+        "exit_code": result.exit_code,
+        "status": result.status.value,
+        "error_type": result.error_type.value if result.error_type else None,
+        "error_message": result.error_message,
+        "traceback": result.traceback
+    }
+
+
+def _serialize_version(version: CodeVersion) -> dict:
+    return {
+        "version": version.version,
+        "code": version.code,
+        "timestamp": version.timestamp_iso,
+        "execution_result": _serialize_execution(version.execution_result)
+    }
+
+
+def _session_payload(session: DebugSession) -> dict:
+    """The full session payload as one dict (non-JSON encoders)"""
+    return {
+        "session_id": session.session_id,
+        "status": session.status,
+        "original_code": session.original_code,
+        "final_code": session.final_code,
+        "current_version": session.current_version,
+        "current_iteration": session.current_iteration,
+        "max_iterations": session.max_iterations,
+        "created_at": session.created_at_iso,
+        "completed_at": session.completed_at.isoformat() if session.completed_at else None,
+        "versions": [_serialize_version(v) for v in session.versions],
+        "patches": [_serialize_patch(p) for p in session.patches],
+        "traces": list(session.traces)
+    }
+
+
+def _iter_session_body(session: DebugSession):
+    """Yield the encoded session payload piecewise
+
+    The scalar scaffold goes out first, then each version and patch is
+    encoded and yielded individually, so peak memory holds one element's
+    dict at a time instead of the whole session tree twice.
+    """
+    head = _json_bytes({
+        "session_id": session.session_id,
+        "status": session.status,
+        "original_code": session.original_code,
+        "final_code": session.final_code,
+        "current_version": session.current_version,
+        "current_iteration": session.current_iteration,
+        "max_iterations": session.max_iterations,
+        "created_at": session.created_at_iso,
+        "completed_at": session.completed_at.isoformat() if session.completed_at else None
+    })
+    yield head[:-1]  # drop the closing brace; the arrays follow
+
+    # Everything but the newest version/patch is closed and re-emitted
+    # byte-for-byte from the frozen cache
+    frozen_versions, frozen_patches = _frozen_lists(session.session_id)
+
+    yield b',"versions":['
+    for i, version in enumerate(session.versions):
+        if i < len(frozen_versions):
+            chunk = frozen_versions[i]
+        else:
+            chunk = _json_bytes(_serialize_version(version))
+            # The index check keeps appends aligned when two polls for
+            # the same session stream concurrently
+            if i < len(session.versions) - 1 and i == len(frozen_versions):
+                frozen_versions.append(chunk)
+        yield (b',' if i else b'') + chunk
+
+    yield b'],"patches":['
+    for i, patch in enumerate(session.patches):
+        if i < len(frozen_patches):
+            chunk = frozen_patches[i]
+        else:
+            chunk = _json_bytes(_serialize_patch(patch))
+            if i < len(session.patches) - 1 and i == len(frozen_patches):
+                frozen_patches.append(chunk)
+        yield (b',' if i else b'') + chunk
+
+    yield b'],"traces":' + _json_bytes(list(session.traces)) + b'}'
+
+
+def _serialize_patch(patch: Patch) -> dict:
+    return {
+        "patch_id": patch.patch_id,
+        "version_from": patch.version_from,
+        "version_to": patch.version_to,
+        "source": patch.source.value,
+        "reasoning": patch.reasoning,
+        "diff": patch.render_diff(),
+        "applied": patch.applied,
+        "timestamp": patch.timestamp_iso,
+        "error_analysis": patch.error_analysis,
+        "fix_strategy": patch.fix_strategy,
+        "error_category": patch.error_category
+    }
+
 
 @app.get("/")
 async def root():
@@ -50,106 +270,126 @@ async def root():
     }
 
 
-@app.post("/api/debug", response_model=SessionResponse)
-async def submit_code(submission: CodeSubmission, background_tasks: BackgroundTasks):
+# response_model would re-validate and re-serialize the already-typed
+# return value; returning the dict directly does the work once
+@app.post("/api/debug", response_model=None)
+async def submit_code(submission: CodeSubmission):
     """
     Submit code for debugging
-    
+
     Returns immediately with session_id, debugging happens in background
     """
     try:
         # Validate code is not empty
         if not submission.code.strip():
             raise HTTPException(status_code=400, detail="Code cannot be empty")
-        
+
         # Create the debug session (returns immediately)
         session = await orchestrator.start_debug_session(
             code=submission.code,
             max_iterations=submission.max_iterations
         )
-        
-        # If session needs debugging, start the loop in background
+
+        # Hand the loop to the worker pool; a full queue applies
+        # backpressure here instead of spawning an unbounded task
         if session.status == "running":
-            background_tasks.add_task(
-                orchestrator.run_debug_loop_for_session,
-                session.session_id
-            )
-        
-        return SessionResponse(
-            session_id=session.session_id,
-            status=session.status,
-            message=f"Debugging session started. Current status: {session.status}"
-        )
+            await app.state.debug_queue.put(session.session_id)
+
+        return {
+            "session_id": session.session_id,
+            "status": session.status,
+            "message": f"Debugging session started. Current status: {session.status}"
+        }
     
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=f"Error starting debug session: {str(e)}")
 
 
+@app.post("/api/debug/stream")
+async def stream_debug(submission: CodeSubmission):
+    """
+    Debug code with LLM output streamed as server-sent events
+
+    Emits token events as the agents generate output, so the frontend can
+    render incrementally instead of waiting for the full completion
+    """
+    if not submission.code.strip():
+        raise HTTPException(status_code=400, detail="Code cannot be empty")
+
+    async def event_stream():
+        async for event in orchestrator.stream_debug_events(submission.code):
+            yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+# Registered before the generic /api/session/{session_id} route:
+# Starlette matches in registration order and {session_id} ([^/]+)
+# would otherwise swallow "<id>.msgpack" whole
+@app.get("/api/session/{session_id}.msgpack")
+async def get_session_msgpack(session_id: str):
+    """
+    Get the session payload encoded as msgpack
+
+    Same shape as /api/session/{id}; useful for bandwidth-bound clients
+    since msgpack elides the repeated JSON string keys. Returns 501 when
+    msgspec is not installed.
+    """
+    if _msgpack_encode is None:
+        raise HTTPException(status_code=501, detail="msgpack support requires msgspec")
+
+    session = orchestrator.get_session(session_id)
+
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    return Response(
+        content=_msgpack_encode(_session_payload(session)),
+        media_type="application/msgpack"
+    )
+
+
 @app.get("/api/session/{session_id}")
-async def get_session(session_id: str):
+async def get_session(session_id: str, request: Request):
     """
     Get complete session information including all versions and patches
     """
     session = orchestrator.get_session(session_id)
-    
+
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    # Serialize versions
-    versions = []
-    for version in session.versions:
-        version_data = {
-            "version": version.version,
-            "code": version.code,
-            "timestamp": version.timestamp.isoformat(),
-            "execution_result": None
-        }
-        
-        if version.execution_result:
-            version_data["execution_result"] = {
-                "stdout": version.execution_result.stdout,
-                "stderr": version.execution_result.stderr,
-                "exit_code": version.execution_result.exit_code,
-                "status": version.execution_result.status.value,
-                "error_type": version.execution_result.error_type.value if version.execution_result.error_type else None,
-                "error_message": version.execution_result.error_message,
-                "traceback": version.execution_result.traceback
-            }
-        
-        versions.append(version_data)
-    
-    # Serialize patches
-    patches = []
-    for patch in session.patches:
-        patches.append({
-            "patch_id": patch.patch_id,
-            "version_from": patch.version_from,
-            "version_to": patch.version_to,
-            "source": patch.source.value,
-            "reasoning": patch.reasoning,
-            "diff": patch.diff,
-            "applied": patch.applied,
-            "timestamp": patch.timestamp.isoformat(),
-            "error_analysis": patch.error_analysis,
-            "fix_strategy": patch.fix_strategy,
-            "error_category": patch.error_category
-        })
-    
-    return {
-        "session_id": session.session_id,
-        "status": session.status,
-        "original_code": session.original_code,
-        "final_code": session.final_code,
-        "current_version": session.current_version,
-        "current_iteration": session.current_iteration,
-        "max_iterations": session.max_iterations,
-        "created_at": session.created_at.isoformat(),
-        "completed_at": session.completed_at.isoformat() if session.completed_at else None,
-        "versions": versions,
-        "patches": patches,
-        "traces": session.traces
-    }
+
+    # Cheap change fingerprint: matching If-None-Match means the client
+    # already holds this exact body, so skip serialization entirely. The
+    # ETag is built from the full state key — status transitions must
+    # change it even when version/iteration/trace counts do not (e.g. the
+    # static pre-check succeeding with tracing disabled)
+    key = _session_state_key(session)
+    etag = '"' + "-".join(str(part) for part in key) + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    cached = _session_body_cache.get(session_id)
+    if cached is not None and cached[0] == key:
+        _session_body_cache.move_to_end(session_id)
+        return Response(content=cached[1], media_type="application/json",
+                        headers={"ETag": etag})
+
+    def stream_and_cache():
+        # Stream the body as it is encoded — the first bytes leave before
+        # the last version is serialized, and the full dict-of-everything
+        # is never materialized — while collecting the chunks so the next
+        # poll is served from the cache
+        parts = []
+        for chunk in _iter_session_body(session):
+            parts.append(chunk)
+            yield chunk
+        _session_body_cache[session_id] = (key, b''.join(parts))
+        while len(_session_body_cache) > _SESSION_CACHE_MAX:
+            _session_body_cache.popitem(last=False)
+
+    return StreamingResponse(stream_and_cache(), media_type="application/json",
+                             headers={"ETag": etag})
 
 
 @app.get("/api/session/{session_id}/status")
@@ -158,11 +398,16 @@ async def get_session_status(session_id: str):
     Get quick status of a session (for polling)
     """
     status = orchestrator.get_session_status(session_id)
-    
+
     if not status:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    return status
+
+    # Mirror the backoff hint as a standard header for generic clients;
+    # the frontend should schedule its next fetch from next_poll_ms
+    return DefaultJSONResponse(
+        content=status,
+        headers={"Retry-After": str(status["next_poll_ms"] // 1000)}
+    )
 
 
 @app.get("/api/session/{session_id}/versions")
@@ -175,31 +420,9 @@ async def get_versions(session_id: str):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    versions = []
-    for version in session.versions:
-        version_data = {
-            "version": version.version,
-            "code": version.code,
-            "timestamp": version.timestamp.isoformat(),
-            "execution_result": None
-        }
-        
-        if version.execution_result:
-            version_data["execution_result"] = {
-                "stdout": version.execution_result.stdout,
-                "stderr": version.execution_result.stderr,
-                "exit_code": version.execution_result.exit_code,
-                "status": version.execution_result.status.value,
-                "error_type": version.execution_result.error_type.value if version.execution_result.error_type else None,
-                "error_message": version.execution_result.error_message,
-                "traceback": version.execution_result.traceback
-            }
-        
-        versions.append(version_data)
-    
     return {
         "session_id": session_id,
-        "versions": versions
+        "versions": [_serialize_version(v) for v in session.versions]
     }
 
 
@@ -213,24 +436,17 @@ async def get_version(session_id: str, version_number: int):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if version_number < 0 or version_number >= len(session.versions):
+    # Let the C-level index check handle the upper bound; only negative
+    # indexes need rejecting explicitly (they would wrap around)
+    try:
+        version = session.versions[version_number] if version_number >= 0 else None
+    except IndexError:
+        version = None
+
+    if version is None:
         raise HTTPException(status_code=404, detail="Version not found")
-    
-    version = session.versions[version_number]
-    
-    return {
-        "version": version.version,
-        "code": version.code,
-        "timestamp": version.timestamp.isoformat(),
-        "execution_result": {
-            "stdout": version.execution_result.stdout,
-            "stderr": version.execution_result.stderr,
-            "exit_code": version.execution_result.exit_code,
-            "status": version.execution_result.status.value,
-            "error_type": version.execution_result.error_type.value if version.execution_result.error_type else None,
-            "error_message": version.execution_result.error_message,
-        } if version.execution_result else None
-    }
+
+    return _serialize_version(version)
 
 
 @app.get("/api/session/{session_id}/patches")
@@ -243,22 +459,9 @@ async def get_patches(session_id: str):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    patches = []
-    for patch in session.patches:
-        patches.append({
-            "patch_id": patch.patch_id,
-            "version_from": patch.version_from,
-            "version_to": patch.version_to,
-            "source": patch.source.value,
-            "reasoning": patch.reasoning,
-            "diff": patch.diff,
-            "applied": patch.applied,
-            "timestamp": patch.timestamp.isoformat()
-        })
-    
     return {
         "session_id": session_id,
-        "patches": patches
+        "patches": [_serialize_patch(p) for p in session.patches]
     }
 
 
@@ -272,25 +475,38 @@ async def get_version_diff(session_id: str, version_from: int, version_to: int):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if version_from < 0 or version_from >= len(session.versions):
+    try:
+        code_from = session.versions[version_from].code if version_from >= 0 else None
+    except IndexError:
+        code_from = None
+    if code_from is None:
         raise HTTPException(status_code=404, detail="Version 'from' not found")
-    
-    if version_to < 0 or version_to >= len(session.versions):
+
+    try:
+        code_to = session.versions[version_to].code if version_to >= 0 else None
+    except IndexError:
+        code_to = None
+    if code_to is None:
         raise HTTPException(status_code=404, detail="Version 'to' not found")
-    
-    import difflib
-    
-    code_from = session.versions[version_from].code
-    code_to = session.versions[version_to].code
-    
-    diff = ''.join(difflib.unified_diff(
-        code_from.splitlines(keepends=True),
-        code_to.splitlines(keepends=True),
-        fromfile=f'version_{version_from}',
-        tofile=f'version_{version_to}',
-        lineterm=''
-    ))
-    
+
+    # Versions are immutable once recorded, so a computed diff never goes
+    # stale; repeats for the same pair become a dict lookup
+    cache_key = (session_id, version_from, version_to)
+    diff = _diff_cache.get(cache_key)
+    if diff is None:
+        diff = ''.join(difflib.unified_diff(
+            code_from.splitlines(keepends=True),
+            code_to.splitlines(keepends=True),
+            fromfile=f'version_{version_from}',
+            tofile=f'version_{version_to}',
+            lineterm=''
+        ))
+        _diff_cache[cache_key] = diff
+        while len(_diff_cache) > _DIFF_CACHE_MAX:
+            _diff_cache.popitem(last=False)
+    else:
+        _diff_cache.move_to_end(cache_key)
+
     return {
         "session_id": session_id,
         "version_from": version_from,
@@ -302,18 +518,23 @@ async def get_version_diff(session_id: str, version_from: int, version_to: int):
 
 
 @app.get("/api/session/{session_id}/traces")
-async def get_traces(session_id: str):
+async def get_traces(session_id: str, since: int = 0):
     """
-    Get all execution traces and logs
+    Get execution traces and logs from index `since` onward
+
+    Pollers pass the count they already hold so only the new tail lines
+    are serialized and sent.
     """
     session = orchestrator.get_session(session_id)
-    
+
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    
+
+    traces = list(islice(session.traces, since, None)) if since > 0 else list(session.traces)
     return {
         "session_id": session_id,
-        "traces": session.traces
+        "since": since,
+        "traces": traces
     }
 
 
@@ -327,7 +548,7 @@ async def list_sessions():
         sessions.append({
             "session_id": session.session_id,
             "status": session.status,
-            "created_at": session.created_at.isoformat(),
+            "created_at": session.created_at_iso,
             "completed_at": session.completed_at.isoformat() if session.completed_at else None,
             "current_iteration": session.current_iteration,
             "max_iterations": session.max_iterations
@@ -344,14 +565,16 @@ async def execute_code(code_submission: CodeSubmission):
     """
     Execute arbitrary code in the specified language and return results
     """
-    from sandbox.executor import CodeExecutor
-    
     try:
-        # Use Docker-based execution with custom image
-        executor = CodeExecutor(timeout=10, use_docker=True)
-        executor.docker_image = "multi-lang-executor:latest"  # Use our multi-language image
-        result = executor.execute_code(code_submission.code, code_submission.language)
-        
+        async with _execute_semaphore:
+            # The Docker exec blocks for the full run; keep it off the
+            # event loop so polling and status requests stay responsive
+            result = await asyncio.to_thread(
+                executor.execute_code,
+                code_submission.code,
+                code_submission.language
+            )
+
         return {
             "success": True,
             "language": code_submission.language,
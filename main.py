@@ -1,8 +1,8 @@
 """
 Main entry point for the backend server
 """
+import os
 import uvicorn
-from backend.server import app
 from dotenv import load_dotenv
 
 if __name__ == "__main__":
@@ -10,11 +10,31 @@ if __name__ == "__main__":
     print("🚀 Starting AI Debugging Sandbox Server...")
     print("📡 API Documentation: http://localhost:8000/docs")
     print("🔧 Backend running on: http://localhost:8000")
-    
-    uvicorn.run(
-        "backend.server:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+
+    debug = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
+
+    if debug:
+        # Development: auto-reload with verbose logging (single worker)
+        uvicorn.run(
+            "backend.server:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        # Production: C event loop + HTTP parser when installed ("auto"
+        # picks uvloop/httptools if available, else asyncio/h11) and no
+        # per-request access logging. Sessions live in process memory, so
+        # the default stays single-worker; WEB_CONCURRENCY can raise it
+        # once a shared session store exists.
+        uvicorn.run(
+            "backend.server:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="auto",
+            http="auto",
+            workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+            log_level="warning",
+            access_log=False
+        )
@@ -0,0 +1,14 @@
+#!/bin/bash
+# Run a compile command followed by a run command without a shell re-parse.
+# Invoked as: build_and_run <compile argv...> -- <run argv...>
+# Arguments are passed as argv, so nothing is string-interpolated through
+# `bash -c` and there is no quoting/injection surface.
+set -e
+compile=()
+while [ "$#" -gt 0 ] && [ "$1" != "--" ]; do
+    compile+=("$1")
+    shift
+done
+shift
+"${compile[@]}"
+exec "$@"
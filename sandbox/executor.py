@@ -1,19 +1,268 @@
+import asyncio
+import atexit
+import logging
+import re
 import subprocess
+import textwrap
 import sys
 import json
 import time
 import tempfile
+import threading
 import os
 import shutil
+from functools import lru_cache
 from pathlib import Path
 from typing import NamedTuple
 
+logger = logging.getLogger(__name__)
+
+
+# The debug loop re-executes identical or near-identical code strings, so
+# the wrapper builds and classname extraction are memoized at module level
+# (pure functions of their arguments; the instance only contributes timeout)
+
+# The wrapper scaffold only varies by timeout, so the head is rendered
+# once per timeout value and the tail is a constant; building a wrapper
+# is then one join over three fragments
+_PY_WRAPPER_TAIL = """
+
+except TimeoutError:
+    print("Execution timed out", file=sys.stderr)
+    sys.exit(124)
+except Exception as e:
+    import traceback
+    print(f"Error: {type(e).__name__}: {e}", file=sys.stderr)
+    traceback.print_exc(file=sys.stderr)
+    sys.exit(1)
+finally:
+    signal.alarm(0)
+"""
+
+
+@lru_cache(maxsize=8)
+def _py_wrapper_head(timeout: int) -> str:
+    return f"""import sys
+import signal
+
+# Set recursion limit to prevent infinite recursion
+sys.setrecursionlimit(1000)
+
+# Timeout handler
+def timeout_handler(signum, frame):
+    raise TimeoutError("Code execution timeout")
+
+# Set up timeout signal
+signal.signal(signal.SIGALRM, timeout_handler)
+signal.alarm({timeout - 2})
+
+try:
+    # User code starts here (indented)
+"""
+
+
+@lru_cache(maxsize=64)
+def _python_wrapper_impl(code: str, timeout: int) -> str:
+    return ''.join((_py_wrapper_head(timeout), textwrap.indent(code, '    '), _PY_WRAPPER_TAIL))
+
+
+@lru_cache(maxsize=64)
+def _cpp_wrapper_impl(code: str) -> str:
+    return f"""#include <iostream>
+#include <vector>
+#include <string>
+#include <algorithm>
+#include <cmath>
+#include <climits>
+using namespace std;
+
+{code}
+"""
+
+
+@lru_cache(maxsize=64)
+def _c_wrapper_impl(code: str) -> str:
+    return f"""#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+#include <limits.h>
+
+{code}
+"""
+
+
+@lru_cache(maxsize=64)
+def _java_wrapper_impl(code: str) -> str:
+    if 'class ' in code and 'public static void main' in code:
+        return code
+
+    return f"""public class Main {{
+    public static void main(String[] args) {{
+{textwrap.indent(code, '        ')}
+    }}
+}}
+"""
+
+
+# Single C-level scan instead of a line split plus per-line whitespace
+# splitting; also tolerates tabs and repeated spaces
+_JAVA_CLASS_RE = re.compile(r'\bpublic\s+class\s+(\w+)')
+
+
+# Resolved once: CPython only takes its posix_spawn (vfork+exec) fast
+# path when the executable is given with a directory component
+_DOCKER = shutil.which("docker") or "docker"
+
+
+def _run_docker(args, **kwargs):
+    """subprocess.run for docker CLI calls, tuned for posix_spawn
+
+    With a resolved binary path, close_fds=False, no cwd, and no
+    preexec_fn, CPython launches via posix_spawn instead of fork+exec,
+    skipping the copy-on-write setup of a full fork. The docker CLI is
+    trusted and the capture pipes sit above fd 2, so not closing
+    inherited fds is harmless here — unlike the user-code subprocesses,
+    which keep the close_fds default.
+    """
+    kwargs.setdefault("close_fds", False)
+    return subprocess.run([_DOCKER, *args], **kwargs)
+
+
+def _clear_workspace(workspace: str):
+    """Empty a pooled container's workspace between runs
+
+    os.scandir yields cached entry types from one getdents pass, so the
+    common case (a couple of files) is a single directory read plus the
+    unlinks — no mkdtemp/rmtree churn like a fresh TemporaryDirectory.
+    """
+    try:
+        with os.scandir(workspace) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    else:
+                        os.unlink(entry.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+
+
+@lru_cache(maxsize=64)
+def _extract_java_classname_impl(code: str) -> str:
+    m = _JAVA_CLASS_RE.search(code)
+    return m.group(1) if m else 'Main'
+
 class ExecutionResult(NamedTuple):
     success: bool
     stdout: str
     stderr: str
     execution_time: float
 
+class ContainerPool:
+    """Long-lived sandbox containers reused across executions
+
+    docker run pays namespace and overlayfs setup on every call, which
+    dominates wall time for short programs. Containers are started with a
+    host workspace bind-mounted at /code and handed out on a strict
+    checkout/checkin basis: each execution owns its container (and
+    workspace) exclusively until checkin, so concurrent runs never share
+    source files or compiled outputs. Spare containers per language are
+    kept idle for reuse; the rest are removed at checkin.
+    """
+
+    _MAX_IDLE_PER_LANGUAGE = 4
+
+    def __init__(self, docker_image: str):
+        self.docker_image = docker_image
+        self._idle = {}     # language -> list of (container_id, workspace)
+        self._active = set()  # entries currently checked out
+        self._lock = threading.Lock()
+        self._cleanup_registered = False
+
+    def acquire(self, language: str):
+        """Check out an exclusive (container_id, workspace_dir) entry
+
+        Reuses an idle container when one is available, otherwise spawns
+        a fresh one. The entry belongs to the caller until checkin() or
+        discard().
+        """
+        with self._lock:
+            idle = self._idle.get(language)
+            if idle:
+                entry = idle.pop()
+                self._active.add(entry)
+                return entry
+            if not self._cleanup_registered:
+                atexit.register(self.shutdown)
+                self._cleanup_registered = True
+
+        entry = self._spawn(language)
+        with self._lock:
+            self._active.add(entry)
+        return entry
+
+    def _spawn(self, language: str):
+        workspace = tempfile.mkdtemp(prefix=f"sandbox-{language}-")
+        result = _run_docker(
+            [
+                "run", "-d",
+                "--network", "none",
+                "--memory", "512m",
+                "--cpus", "1.0",
+                "--user", "coderunner",
+                "-v", f"{workspace}:/code:rw",
+                "-w", "/code",
+                self.docker_image,
+                "tail", "-f", "/dev/null"
+            ],
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        if result.returncode != 0:
+            shutil.rmtree(workspace, ignore_errors=True)
+            raise RuntimeError(f"Failed to start pooled container: {result.stderr.strip()}")
+
+        return result.stdout.strip(), workspace
+
+    def checkin(self, language: str, entry):
+        """Return a healthy container; surplus idles are removed"""
+        with self._lock:
+            self._active.discard(entry)
+            idle = self._idle.setdefault(language, [])
+            if len(idle) < self._MAX_IDLE_PER_LANGUAGE:
+                idle.append(entry)
+                return
+        self._remove(entry)
+
+    def discard(self, entry):
+        """Drop a container that misbehaved so it is never reused"""
+        with self._lock:
+            self._active.discard(entry)
+        self._remove(entry)
+
+    @staticmethod
+    def _remove(entry):
+        cid, workspace = entry
+        try:
+            _run_docker(["rm", "-f", cid], capture_output=True, timeout=30)
+        except subprocess.TimeoutExpired:
+            pass
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    def shutdown(self):
+        """Remove all pooled containers and their workspaces"""
+        with self._lock:
+            entries = [e for idle in self._idle.values() for e in idle]
+            entries.extend(self._active)
+            self._idle.clear()
+            self._active.clear()
+        for entry in entries:
+            self._remove(entry)
+
 class CodeExecutor:
     """Docker-based code executor for multiple programming languages"""
     
@@ -21,13 +270,27 @@ class CodeExecutor:
         self.timeout = timeout
         self.use_docker = use_docker
         self.docker_image = "multi-lang-executor:latest"
-        
+        # Built lazily on first Docker execution so docker_image can still
+        # be overridden after construction
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._build_helper_ok = None
+        # TTL-cached result of the docker availability probe
+        self._docker_ok = None
+        self._docker_ok_ts = 0.0
+
+        if self.use_docker:
+            # Pay the image pull and first container start at process
+            # startup instead of on the first real execution
+            threading.Thread(target=self._warmup, daemon=True).start()
+
         # Language configurations
         self.language_configs = {
             'python': {
                 'extension': '.py',
                 'compile_cmd': None,
                 'run_cmd': ['python', '{filename}'],
+                'stdin_cmd': ['python', '-'],  # interpreted: no file needed
                 'wrapper': self._python_wrapper
             },
             'cpp': {
@@ -49,114 +312,252 @@ class CodeExecutor:
                 'wrapper': self._java_wrapper
             }
         }
-    def _python_wrapper(self, code: str) -> str:
-        """Wrap Python code with safety measures"""
-        indented_code = '\n'.join('    ' + line if line.strip() else line for line in code.split('\n'))
-        
-        return f"""import sys
-import signal
 
-# Set recursion limit to prevent infinite recursion
-sys.setrecursionlimit(1000)
+        # Precompile the command templates: tokens without placeholders
+        # pass through verbatim instead of running str.format on every
+        # token of every execution
+        for config in self.language_configs.values():
+            config['compile_fn'] = self._compile_template(config['compile_cmd'])
+            config['run_fn'] = self._compile_template(config['run_cmd'])
 
-# Timeout handler
-def timeout_handler(signum, frame):
-    raise TimeoutError("Code execution timeout")
+    @staticmethod
+    def _compile_template(templates):
+        """Turn a command template list into a substitution callable"""
+        if templates is None:
+            return None
 
-# Set up timeout signal
-signal.signal(signal.SIGALRM, timeout_handler)
-signal.alarm({self.timeout - 2})
+        needs_format = ['{' in t for t in templates]
+        if not any(needs_format):
+            fixed = list(templates)
+            return lambda filename='', output='', classname='': list(fixed)
 
-try:
-    # User code starts here (indented)
-{indented_code}
-    
-except TimeoutError:
-    print("Execution timed out", file=sys.stderr)
-    sys.exit(124)
-except Exception as e:
-    import traceback
-    print(f"Error: {{type(e).__name__}}: {{e}}", file=sys.stderr)
-    traceback.print_exc(file=sys.stderr)
-    sys.exit(1)
-finally:
-    signal.alarm(0)
-"""
+        def build(filename='', output='', classname=''):
+            return [
+                t.format(filename=filename, output=output, classname=classname) if n else t
+                for t, n in zip(templates, needs_format)
+            ]
+        return build
+    def _python_wrapper(self, code: str) -> str:
+        """Wrap Python code with safety measures"""
+        return _python_wrapper_impl(code, self.timeout)
 
     def _cpp_wrapper(self, code: str) -> str:
         """Wrap C++ code with basic includes"""
-        return f"""#include <iostream>
-#include <vector>
-#include <string>
-#include <algorithm>
-#include <cmath>
-#include <climits>
-using namespace std;
-
-{code}
-"""
+        return _cpp_wrapper_impl(code)
 
     def _c_wrapper(self, code: str) -> str:
         """Wrap C code with basic includes"""
-        return f"""#include <stdio.h>
-#include <stdlib.h>
-#include <string.h>
-#include <math.h>
-#include <limits.h>
-
-{code}
-"""
+        return _c_wrapper_impl(code)
 
     def _java_wrapper(self, code: str) -> str:
         """Wrap Java code in a Main class if needed"""
-        if 'class ' in code and 'public static void main' in code:
-            return code
-        
-        return f"""public class Main {{
-    public static void main(String[] args) {{
-{chr(10).join('        ' + line if line.strip() else line for line in code.split(chr(10)))}
-    }}
-}}
-"""
+        return _java_wrapper_impl(code)
 
     def _extract_java_classname(self, code: str) -> str:
         """Extract class name from Java code"""
-        lines = code.split('\n')
-        for line in lines:
-            if 'public class' in line:
-                parts = line.strip().split()
-                if 'class' in parts:
-                    class_idx = parts.index('class')
-                    if class_idx + 1 < len(parts):
-                        return parts[class_idx + 1].replace('{', '').strip()
-        return 'Main'
-        """Check if Docker is available and running"""
+        return _extract_java_classname_impl(code)
+
+    def _compile_exec_args(self, container_id: str, compile_cmd, run_cmd):
+        """docker exec argv for a compile+run pair
+
+        Prefers the image's build_and_run helper, which takes both
+        commands as argv — no bash -c string to interpolate or re-parse.
+        Older images without the helper get the previous shell form.
+        """
+        if self._supports_build_helper(container_id):
+            return ["exec", container_id, "build_and_run", *compile_cmd, "--", *run_cmd]
+        shell_cmd = f"{' '.join(compile_cmd)} && {' '.join(run_cmd)}"
+        return ["exec", container_id, "bash", "-c", shell_cmd]
+
+    def _supports_build_helper(self, container_id: str) -> bool:
+        """Whether the image ships build_and_run (probed once per process)"""
+        if self._build_helper_ok is None:
+            try:
+                probe = _run_docker(
+                    ["exec", container_id, "test", "-x", "/usr/local/bin/build_and_run"],
+                    capture_output=True,
+                    timeout=10
+                )
+                self._build_helper_ok = probe.returncode == 0
+            except subprocess.TimeoutExpired:
+                self._build_helper_ok = False
+        return self._build_helper_ok
+
+    def _get_pool(self) -> ContainerPool:
+        """The container pool, created once under a lock"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ContainerPool(self.docker_image)
+            return self._pool
+
+    def _warmup(self):
+        """Prime Docker state in the background
+
+        Ensures the image is present (pulling if needed) and spawns the
+        Python pool container with a no-op exec, so the first user
+        execution skips the cold-start tax. Best effort: any failure is
+        left for the first real execution to surface or fall back on.
+        """
         try:
-            result = subprocess.run(
-                ["docker", "--version"],
+            if not self._check_docker_available():
+                return
+            result = _run_docker(
+                ["image", "inspect", self.docker_image],
                 capture_output=True,
-                text=True,
-                timeout=5
+                timeout=30
             )
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
-    
+            if result.returncode != 0:
+                _run_docker(
+                    ["pull", self.docker_image],
+                    capture_output=True,
+                    timeout=600
+                )
+            entry = self._get_pool().acquire('python')
+            _run_docker(["exec", entry[0], "true"], capture_output=True, timeout=30)
+            self._pool.checkin('python', entry)
+        except Exception as e:
+            logger.debug("Docker warmup skipped: %s", e)
+
+    _DOCKER_CHECK_TTL = 30.0  # seconds between availability probes
+
     def _check_docker_available(self) -> bool:
-        """Check if Docker is available and running"""
+        """Check if Docker is available and running
+
+        The probe forks a docker CLI process (~tens of ms), so the result
+        is cached for a short TTL — execute_code calls it on every
+        invocation and availability rarely flips mid-loop.
+        """
+        now = time.monotonic()
+        if self._docker_ok is not None and now - self._docker_ok_ts < self._DOCKER_CHECK_TTL:
+            return self._docker_ok
+
         try:
-            result = subprocess.run(
-                ["docker", "--version"],
+            result = _run_docker(
+                ["--version"],
                 capture_output=True,
                 text=True,
                 timeout=5
             )
-            return result.returncode == 0
+            available = result.returncode == 0
         except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
+            available = False
+
+        self._docker_ok = available
+        self._docker_ok_ts = now
+        return available
     
     def _execute_in_docker(self, code: str, language: str = 'python') -> ExecutionResult:
-        """Execute code in a Docker container"""
+        """Execute code in a pooled Docker container via docker exec
+
+        The container (and its bind-mounted workspace) persists across
+        calls, so each execution only pays for the exec itself instead of
+        full container startup. Falls back to a cold docker run when the
+        pool cannot be started.
+        """
+        start_time = time.time()
+
+        if language not in self.language_configs:
+            return ExecutionResult(
+                success=False,
+                stdout="",
+                stderr=f"Unsupported language: {language}",
+                execution_time=0.0
+            )
+
+        config = self.language_configs[language]
+
+        try:
+            entry = self._get_pool().acquire(language)
+        except Exception:
+            # Pool startup failed (missing image, daemon hiccup) — pay the
+            # cold-start price rather than failing the execution
+            return self._execute_in_docker_cold(code, language)
+        container_id, workspace = entry
+
+        wrapped_code = config['wrapper'](code)
+        if language == 'java':
+            classname = self._extract_java_classname(wrapped_code)
+            filename = f"{classname}.java"
+        else:
+            filename = f"usercode{config['extension']}"
+
+        discarded = False
+        try:
+            # Interpreted languages take the source on stdin — no file
+            # write, no workspace involvement at all
+            stdin_cmd = config.get('stdin_cmd')
+            if stdin_cmd:
+                result = _run_docker(
+                    ["exec", "-i", container_id] + stdin_cmd,
+                    input=wrapped_code,
+                    capture_output=True,
+                    text=True,
+                    timeout=self.timeout + 10
+                )
+                return ExecutionResult(
+                    success=(result.returncode == 0),
+                    stdout=result.stdout,
+                    stderr=result.stderr,
+                    execution_time=time.time() - start_time
+                )
+
+            (Path(workspace) / filename).write_bytes(wrapped_code.encode('utf-8'))
+
+            if config['compile_cmd']:
+                output_name = filename.replace(config['extension'], '')
+                cname = classname if language == 'java' else output_name
+                compile_cmd = config['compile_fn'](filename, output_name, cname)
+                run_cmd = config['run_fn'](filename, output_name, cname)
+                exec_args = self._compile_exec_args(container_id, compile_cmd, run_cmd)
+            else:
+                # Plain argv exec — no shell at all
+                exec_args = ["exec", container_id] + config['run_fn'](filename)
+
+            result = _run_docker(
+                exec_args,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout + 10  # Extra time for compilation
+            )
+
+            execution_time = time.time() - start_time
+
+            return ExecutionResult(
+                success=(result.returncode == 0),
+                stdout=result.stdout,
+                stderr=result.stderr,
+                execution_time=execution_time
+            )
+
+        except subprocess.TimeoutExpired:
+            # A runaway process is still alive inside the container; drop
+            # the whole container so it is never reused
+            self._pool.discard(entry)
+            discarded = True
+            execution_time = time.time() - start_time
+            return ExecutionResult(
+                success=False,
+                stdout="",
+                stderr=f"Docker execution timed out after {self.timeout} seconds",
+                execution_time=execution_time
+            )
+        except Exception as e:
+            execution_time = time.time() - start_time
+            return ExecutionResult(
+                success=False,
+                stdout="",
+                stderr=f"Docker execution failed: {str(e)}",
+                execution_time=execution_time
+            )
+        finally:
+            if not discarded:
+                # Clear the workspace before the container goes back to
+                # the pool so later runs cannot see this run's files
+                _clear_workspace(workspace)
+                self._pool.checkin(language, entry)
+
+    def _execute_in_docker_cold(self, code: str, language: str = 'python') -> ExecutionResult:
+        """Execute code in a fresh --rm container (slow path)"""
         start_time = time.time()
         
         if language not in self.language_configs:
@@ -187,7 +588,7 @@ using namespace std;
                     filename = f"usercode{config['extension']}"
                 
                 code_file = Path(temp_dir) / filename
-                code_file.write_text(wrapped_code, encoding='utf-8')
+                code_file.write_bytes(wrapped_code.encode('utf-8'))
                 
                 # Prepare Docker command
                 docker_cmd = [
@@ -205,38 +606,30 @@ using namespace std;
                 # Add compilation step if needed
                 if config['compile_cmd']:
                     output_name = filename.replace(config['extension'], '')
-                    if language == 'java':
-                        compile_cmd = [cmd.format(filename=filename, output=output_name, classname=classname) 
-                                     for cmd in config['compile_cmd']]
-                        run_cmd = [cmd.format(filename=filename, output=output_name, classname=classname) 
-                                 for cmd in config['run_cmd']]
-                    else:
-                        compile_cmd = [cmd.format(filename=filename, output=output_name) 
-                                     for cmd in config['compile_cmd']]
-                        run_cmd = [cmd.format(filename=filename, output=output_name) 
-                                 for cmd in config['run_cmd']]
-                    
+                    cname = classname if language == 'java' else output_name
+                    compile_cmd = config['compile_fn'](filename, output_name, cname)
+                    run_cmd = config['run_fn'](filename, output_name, cname)
+
                     # Compile and run
                     full_cmd = docker_cmd + ["bash", "-c", f"{' '.join(compile_cmd)} && {' '.join(run_cmd)}"]
                 else:
                     # Direct execution (Python)
-                    run_cmd = [cmd.format(filename=filename) for cmd in config['run_cmd']]
+                    run_cmd = config['run_fn'](filename)
                     full_cmd = docker_cmd + run_cmd
                 
-                # Execute in Docker
+                # Execute in Docker; %s formatting is lazy, so the joins
+                # and truncations only happen when debug logging is on
                 try:
-                    print(f"DEBUG: Running command: {' '.join(full_cmd)}")  # Debug output
+                    logger.debug("Running command: %s", full_cmd)
                     result = subprocess.run(
                         full_cmd,
                         capture_output=True,
                         text=True,
                         timeout=self.timeout + 10  # Extra time for compilation
                     )
-                    print(f"DEBUG: Return code: {result.returncode}")  # Debug output
-                    print(f"DEBUG: Stdout: {result.stdout[:200]}...")  # Debug output
-                    print(f"DEBUG: Stderr: {result.stderr[:200]}...")  # Debug output
+                    logger.debug("Return code: %s", result.returncode)
                 except subprocess.CalledProcessError as e:
-                    print(f"DEBUG: CalledProcessError: {e}")
+                    logger.debug("CalledProcessError: %s", e)
                     execution_time = time.time() - start_time
                     return ExecutionResult(
                         success=False,
@@ -271,99 +664,44 @@ using namespace std;
                 execution_time=execution_time
             )
     
-    def _execute_locally(self, code: str) -> ExecutionResult:
+    def _execute_locally(self, code: str, language: str = 'python') -> ExecutionResult:
         """Fallback: Execute code locally without Docker"""
         start_time = time.time()
         
-        try:
-            # Create temporary file for user code
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-                # Indent all user code to fit inside the try block
-                indented_code = '\n'.join('    ' + line if line.strip() else line for line in code.split('\n'))
-                
-                # Add basic safety limits
-                safe_code = f"""import sys
+        if language not in self.language_configs:
+            return ExecutionResult(
+                success=False,
+                stdout="",
+                stderr=f"Unsupported language: {language}",
+                execution_time=0.0
+            )
+        
+        config = self.language_configs[language]
 
-# Set recursion limit to prevent infinite recursion
-sys.setrecursionlimit(1000)
+        try:
+            # Prepare code with wrapper
+            wrapped_code = config['wrapper'](code)
 
-try:
-    # User code starts here (indented)
-{indented_code}
-    
-except Exception as e:
-    import traceback
-    print(f"Error: {{type(e).__name__}}: {{e}}", file=sys.stderr)
-    traceback.print_exc(file=sys.stderr)
-    sys.exit(1)
-"""
-                f.write(safe_code)
-                temp_file = f.name
-            
-            try:
-                # Execute the code
+            # Interpreted languages need no source file: pass the code
+            # straight to the interpreter, skipping tempdir setup, the
+            # file write, and the unlink
+            if not config['compile_cmd']:
                 result = subprocess.run(
-                    [sys.executable, temp_file],
+                    [sys.executable, "-c", wrapped_code],
                     capture_output=True,
                     text=True,
-                    timeout=self.timeout,
-                    cwd=Path(temp_file).parent  # Run in temp directory
+                    timeout=self.timeout
                 )
-                
                 execution_time = time.time() - start_time
-                
                 return ExecutionResult(
                     success=(result.returncode == 0),
                     stdout=result.stdout,
                     stderr=result.stderr,
                     execution_time=execution_time
                 )
-                
-            except subprocess.TimeoutExpired:
-                execution_time = time.time() - start_time
-                return ExecutionResult(
-                    success=False,
-                    stdout="",
-                    stderr=f"Execution timed out after {self.timeout} seconds",
-                    execution_time=execution_time
-                )
-                
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_file)
-                except OSError:
-                    pass
-                    
-        except Exception as e:
-            execution_time = time.time() - start_time
-            return ExecutionResult(
-                success=False,
-                stdout="",
-                stderr=f"Execution failed: {str(e)}",
-                execution_time=execution_time
-            )
-    
-    def _execute_locally(self, code: str, language: str = 'python') -> ExecutionResult:
-        """Fallback: Execute code locally without Docker"""
-        start_time = time.time()
-        
-        if language not in self.language_configs:
-            return ExecutionResult(
-                success=False,
-                stdout="",
-                stderr=f"Unsupported language: {language}",
-                execution_time=0.0
-            )
-        
-        config = self.language_configs[language]
-        
-        try:
+
             # Create temporary file for user code
             with tempfile.TemporaryDirectory() as temp_dir:
-                # Prepare code with wrapper
-                wrapped_code = config['wrapper'](code)
-                
                 # Create source file
                 if language == 'java':
                     classname = self._extract_java_classname(wrapped_code)
@@ -372,73 +710,63 @@ except Exception as e:
                     filename = f"usercode{config['extension']}"
                 
                 code_file = Path(temp_dir) / filename
-                code_file.write_text(wrapped_code, encoding='utf-8')
-                
-                # Change to temp directory for execution
-                original_cwd = os.getcwd()
-                os.chdir(temp_dir)
+                code_file.write_bytes(wrapped_code.encode('utf-8'))
                 
-                try:
-                    # Compilation step if needed
-                    if config['compile_cmd']:
-                        output_name = filename.replace(config['extension'], '')
-                        if language == 'java':
-                            compile_cmd = [cmd.format(filename=filename, output=output_name, classname=classname) 
-                                         for cmd in config['compile_cmd']]
-                            run_cmd = [cmd.format(filename=filename, output=output_name, classname=classname) 
-                                     for cmd in config['run_cmd']]
-                        else:
-                            compile_cmd = [cmd.format(filename=filename, output=output_name) 
-                                         for cmd in config['compile_cmd']]
-                            run_cmd = [cmd.format(filename=filename, output=output_name) 
-                                     for cmd in config['run_cmd']]
-                        
-                        # Compile first
-                        compile_result = subprocess.run(
-                            compile_cmd,
-                            capture_output=True,
-                            text=True,
-                            timeout=self.timeout
-                        )
-                        
-                        if compile_result.returncode != 0:
-                            execution_time = time.time() - start_time
-                            return ExecutionResult(
-                                success=False,
-                                stdout=compile_result.stdout,
-                                stderr=f"Compilation failed:\n{compile_result.stderr}",
-                                execution_time=execution_time
-                            )
-                        
-                        # Run the compiled program
-                        result = subprocess.run(
-                            run_cmd,
-                            capture_output=True,
-                            text=True,
-                            timeout=self.timeout
-                        )
-                    else:
-                        # Direct execution (Python)
-                        run_cmd = [cmd.format(filename=filename) for cmd in config['run_cmd']]
-                        result = subprocess.run(
-                            run_cmd,
-                            capture_output=True,
-                            text=True,
-                            timeout=self.timeout
+                # Run in the temp directory via cwd= — os.chdir is
+                # process-global and would race under threaded callers
+                # Compilation step if needed
+                if config['compile_cmd']:
+                    output_name = filename.replace(config['extension'], '')
+                    cname = classname if language == 'java' else output_name
+                    compile_cmd = config['compile_fn'](filename, output_name, cname)
+                    run_cmd = config['run_fn'](filename, output_name, cname)
+
+                    # Compile first
+                    compile_result = subprocess.run(
+                        compile_cmd,
+                        capture_output=True,
+                        text=True,
+                        timeout=self.timeout,
+                        cwd=temp_dir
+                    )
+
+                    if compile_result.returncode != 0:
+                        execution_time = time.time() - start_time
+                        return ExecutionResult(
+                            success=False,
+                            stdout=compile_result.stdout,
+                            stderr=f"Compilation failed:\n{compile_result.stderr}",
+                            execution_time=execution_time
                         )
-                    
-                    execution_time = time.time() - start_time
-                    
-                    return ExecutionResult(
-                        success=(result.returncode == 0),
-                        stdout=result.stdout,
-                        stderr=result.stderr,
-                        execution_time=execution_time
+
+                    # Run the compiled program
+                    result = subprocess.run(
+                        run_cmd,
+                        capture_output=True,
+                        text=True,
+                        timeout=self.timeout,
+                        cwd=temp_dir
                     )
-                    
-                finally:
-                    os.chdir(original_cwd)
-                
+                else:
+                    # Direct execution (Python)
+                    run_cmd = config['run_fn'](filename)
+                    result = subprocess.run(
+                        run_cmd,
+                        capture_output=True,
+                        text=True,
+                        timeout=self.timeout,
+                        cwd=temp_dir
+                    )
+
+                execution_time = time.time() - start_time
+
+                return ExecutionResult(
+                    success=(result.returncode == 0),
+                    stdout=result.stdout,
+                    stderr=result.stderr,
+                    execution_time=execution_time
+                )
+
         except subprocess.TimeoutExpired:
             execution_time = time.time() - start_time
             return ExecutionResult(
@@ -458,40 +786,121 @@ except Exception as e:
     
     def execute_code(self, code: str, language: str = 'python') -> ExecutionResult:
         """Execute code in the specified language, preferring Docker if available"""
-        
-        # For now, let's try a simple test first
-        if language == 'python' and self.use_docker and self._check_docker_available():
-            try:
-                # Simple test - run Python directly
-                start_time = time.time()
-                result = subprocess.run(
-                    ["docker", "run", "--rm", self.docker_image, "python", "-c", code],
-                    capture_output=True,
-                    text=True,
-                    timeout=self.timeout
-                )
-                execution_time = time.time() - start_time
-                
-                return ExecutionResult(
-                    success=(result.returncode == 0),
-                    stdout=result.stdout,
-                    stderr=result.stderr,
-                    execution_time=execution_time
-                )
-            except Exception as e:
-                print(f"Simple Docker test failed: {e}")
-        
+
         # Try Docker first if enabled and available
         if self.use_docker and self._check_docker_available():
             try:
                 return self._execute_in_docker(code, language)
             except Exception as e:
-                # If Docker fails, fall back to local execution
-                print(f"Docker execution failed, falling back to local: {e}")
+                # If Docker fails, fall back to local execution; keep this
+                # off stdout, which serve() reserves for JSON responses
+                logger.warning("Docker execution failed, falling back to local: %s", e)
         
         # Fallback to local execution
         return self._execute_locally(code, language)
 
+    async def _execute_in_docker_async(self, code: str, language: str = 'python') -> ExecutionResult:
+        """Async twin of _execute_in_docker for concurrent candidate runs
+
+        The docker exec runs under asyncio.create_subprocess_exec, so a
+        caller can fan out several executions (one per pooled container)
+        without tying up threads for the container wait.
+        """
+        start_time = time.time()
+
+        if language not in self.language_configs:
+            return ExecutionResult(
+                success=False,
+                stdout="",
+                stderr=f"Unsupported language: {language}",
+                execution_time=0.0
+            )
+
+        config = self.language_configs[language]
+
+        try:
+            # acquire may spawn a container — blocking CLI work
+            entry = await asyncio.to_thread(self._get_pool().acquire, language)
+        except Exception:
+            return await asyncio.to_thread(self._execute_in_docker_cold, code, language)
+        container_id, workspace = entry
+
+        wrapped_code = config['wrapper'](code)
+        if language == 'java':
+            classname = self._extract_java_classname(wrapped_code)
+            filename = f"{classname}.java"
+        else:
+            filename = f"usercode{config['extension']}"
+
+        discarded = False
+        try:
+            stdin_cmd = config.get('stdin_cmd')
+            if stdin_cmd:
+                cmd = [_DOCKER, "exec", "-i", container_id] + stdin_cmd
+                stdin_payload = wrapped_code.encode()
+            else:
+                (Path(workspace) / filename).write_bytes(wrapped_code.encode('utf-8'))
+                output_name = filename.replace(config['extension'], '')
+                cname = classname if language == 'java' else output_name
+                compile_cmd = config['compile_fn'](filename, output_name, cname)
+                run_cmd = config['run_fn'](filename, output_name, cname)
+                exec_args = await asyncio.to_thread(
+                    self._compile_exec_args, container_id, compile_cmd, run_cmd
+                )
+                cmd = [_DOCKER] + exec_args
+                stdin_payload = None
+
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE if stdin_payload else None,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    proc.communicate(input=stdin_payload),
+                    timeout=self.timeout + 10
+                )
+            except asyncio.TimeoutError:
+                proc.kill()
+                await asyncio.to_thread(self._pool.discard, entry)
+                discarded = True
+                return ExecutionResult(
+                    success=False,
+                    stdout="",
+                    stderr=f"Docker execution timed out after {self.timeout} seconds",
+                    execution_time=time.time() - start_time
+                )
+
+            return ExecutionResult(
+                success=(proc.returncode == 0),
+                stdout=stdout.decode(errors='replace'),
+                stderr=stderr.decode(errors='replace'),
+                execution_time=time.time() - start_time
+            )
+        except Exception as e:
+            return ExecutionResult(
+                success=False,
+                stdout="",
+                stderr=f"Docker execution failed: {str(e)}",
+                execution_time=time.time() - start_time
+            )
+        finally:
+            if not discarded:
+                if not config.get('stdin_cmd'):
+                    await asyncio.to_thread(_clear_workspace, workspace)
+                await asyncio.to_thread(self._pool.checkin, language, entry)
+
+    async def execute_code_async(self, code: str, language: str = 'python') -> ExecutionResult:
+        """Async variant of execute_code with the same fallback chain"""
+        if self.use_docker and await asyncio.to_thread(self._check_docker_available):
+            try:
+                return await self._execute_in_docker_async(code, language)
+            except Exception as e:
+                logger.warning("Docker execution failed, falling back to local: %s", e)
+
+        return await asyncio.to_thread(self._execute_locally, code, language)
+
 # Legacy functions for backward compatibility
 def limit_resources():
     """Placeholder for Unix resource limits (not available on Windows)"""
@@ -518,5 +927,41 @@ def run():
     
     print(json.dumps(output))
 
+def serve():
+    """Persistent worker loop: one JSON request per stdin line
+
+    Started with --serve by the backend's long-lived pipe so the process
+    (and its CodeExecutor) survives across executions; each line is handled
+    like run() but without paying interpreter startup per call. Requests
+    and responses are single-line JSON, newline-delimited.
+    """
+    executor = CodeExecutor()
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+            result = executor.execute_code(data["code"], data.get("language", "python"))
+            output = {
+                "stdout": result.stdout,
+                "stderr": result.stderr,
+                "exit_code": 0 if result.success else -1,
+                "execution_time": result.execution_time
+            }
+        except Exception as e:
+            output = {
+                "stdout": "",
+                "stderr": f"Worker error: {e}",
+                "exit_code": -1,
+                "execution_time": 0.0
+            }
+        sys.stdout.write(json.dumps(output) + "\n")
+        sys.stdout.flush()
+
+
 if __name__ == "__main__":
-    run()
+    if "--serve" in sys.argv[1:]:
+        serve()
+    else:
+        run()